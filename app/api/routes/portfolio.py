@@ -5,7 +5,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, func
 
 from app.models.database import get_db
 from app.models.position import Position
@@ -46,19 +46,22 @@ class PositionResponse(BaseModel):
 async def get_portfolio(db: AsyncSession = Depends(get_db)):
     """Get portfolio overview"""
     try:
-        # Get open positions
+        # Aggregate in SQL rather than loading every row
         positions_result = await db.execute(
-            select(Position).where(Position.is_open == True)
+            select(
+                func.coalesce(func.sum(Position.unrealized_pnl), 0.0),
+                func.count(Position.id)
+            ).where(Position.is_open == True)
         )
-        positions = positions_result.scalars().all()
+        total_unrealized_pnl, open_positions = positions_result.one()
         
-        # Get all trades
-        trades_result = await db.execute(select(Trade))
-        trades = trades_result.scalars().all()
-        
-        # Calculate metrics
-        total_unrealized_pnl = sum(p.unrealized_pnl for p in positions)
-        total_realized_pnl = sum(t.realized_pnl for t in trades if t.realized_pnl)
+        trades_result = await db.execute(
+            select(
+                func.coalesce(func.sum(Trade.realized_pnl), 0.0),
+                func.count()
+            ).select_from(Trade)
+        )
+        total_realized_pnl, total_trades = trades_result.one()
         
         # Get initial and current balance from config or calculate
         from app.config import get_settings
@@ -77,8 +80,8 @@ async def get_portfolio(db: AsyncSession = Depends(get_db)):
             realized_pnl=total_realized_pnl,
             total_pnl=total_pnl,
             total_return_pct=total_return,
-            open_positions=len(positions),
-            total_trades=len(trades)
+            open_positions=open_positions,
+            total_trades=total_trades
         )
         
     except Exception as e:
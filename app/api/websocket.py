@@ -68,7 +68,7 @@ async def event_broadcaster():
         message = {
             "type": event.event_type.value,
             "data": event.data,
-            "timestamp": event.timestamp.isoformat(),
+            "timestamp": event.created_at.isoformat(),
             "source": event.source
         }
         await manager.broadcast(message)
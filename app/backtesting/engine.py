@@ -1,6 +1,9 @@
 """
 Backtesting engine for strategy validation
 """
+import asyncio
+import time
+import numpy as np
 import pandas as pd
 from typing import Optional, Dict, List
 from datetime import datetime
@@ -37,6 +40,8 @@ class BacktestEngine:
         self.strategy = strategy
         self.initial_capital = initial_capital
         self.commission = commission
+        self._buy_mult = 1.0 + commission
+        self._sell_mult = 1.0 - commission
         
         # Portfolio state
         self.cash = initial_capital
@@ -63,6 +68,9 @@ class BacktestEngine:
         """
         Run backtest on historical data
         
+        Strategies that implement analyze_sync() are run through run_sync()
+        in a worker thread; others are awaited bar by bar.
+        
         Args:
             data: DataFrame with OHLCV data and indicators
             verbose: Print detailed logs
@@ -70,10 +78,10 @@ class BacktestEngine:
         Returns:
             Backtest results with metrics
         """
-        log.info(f"Starting backtest for {self.strategy.name} on {len(data)} bars")
+        if self.strategy.supports_sync:
+            return await asyncio.to_thread(self.run_sync, data, verbose)
         
-        # Reset state
-        self._reset()
+        ts_values = self._start(data)
         
         # Iterate through historical data
         for i in range(len(data)):
@@ -85,7 +93,7 @@ class BacktestEngine:
             
             # Get current price
             current_price = current_data['close'].iloc[-1]
-            timestamp = current_data.index[-1] if isinstance(current_data.index, pd.DatetimeIndex) else datetime.utcnow()
+            timestamp = ts_values[i]
             
             # Check if we should close existing position
             if self.position_size > 0:
@@ -94,54 +102,129 @@ class BacktestEngine:
                     self.position_side,
                     self.position_entry_price
                 )
-                
-                if should_close:
-                    self._close_position(
-                        timestamp,
-                        current_price,
-                        reason
-                    )
-                    
-                    if verbose:
-                        log.info(f"Closed position at ${current_price:.2f} ({reason})")
+                self._handle_exit(should_close, reason, timestamp, current_price, verbose)
             
             # Generate signal
             signal = await self.strategy.analyze(current_data)
+            self._handle_signal(signal, timestamp, current_price, verbose)
+        
+        return self._finish(data, ts_values)
+    
+    def run_sync(
+        self,
+        data: pd.DataFrame,
+        verbose: bool = False
+    ) -> Dict:
+        """
+        Run backtest synchronously (requires strategy.analyze_sync)
+        
+        Args:
+            data: DataFrame with OHLCV data and indicators
+            verbose: Print detailed logs
+        
+        Returns:
+            Backtest results with metrics
+        """
+        ts_values = self._start(data)
+        
+        for i in range(len(data)):
+            current_data = data.iloc[:i+1]
+            
+            if len(current_data) < 50:  # Need minimum data for indicators
+                continue
+            
+            current_price = current_data['close'].iloc[-1]
+            timestamp = ts_values[i]
             
-            # Execute trade based on signal
-            if signal == Signal.BUY and self.position_size == 0:
-                # Calculate position size
-                position_value = self.cash * 0.95  # Use 95% of available cash
-                amount = position_value / current_price
-                
-                self._open_position(
-                    timestamp,
-                    'long',
-                    amount,
-                    current_price
+            if self.position_size > 0:
+                should_close, reason = self.strategy.should_close_position_sync(
+                    current_data,
+                    self.position_side,
+                    self.position_entry_price
                 )
-                
-                if verbose:
-                    log.info(f"Opened LONG at ${current_price:.2f} | Amount: {amount:.4f}")
+                self._handle_exit(should_close, reason, timestamp, current_price, verbose)
+            
+            signal = self.strategy.analyze_sync(current_data)
+            self._handle_signal(signal, timestamp, current_price, verbose)
+        
+        return self._finish(data, ts_values)
+    
+    def _start(self, data: pd.DataFrame) -> np.ndarray:
+        """Reset state and return bar timestamps as int64 epoch nanoseconds"""
+        log.info(f"Starting backtest for {self.strategy.name} on {len(data)} bars")
+        
+        # Reset state
+        self._reset()
+        
+        # Bar timestamps as int64 epoch nanoseconds, resolved once up front
+        if isinstance(data.index, pd.DatetimeIndex):
+            return data.index.values.astype('datetime64[ns]').view('i8')
+        return np.full(len(data), time.time_ns(), dtype=np.int64)
+    
+    def _handle_exit(
+        self,
+        should_close: bool,
+        reason: str,
+        timestamp: int,
+        current_price: float,
+        verbose: bool
+    ):
+        """Close the open position if the strategy asked for it"""
+        if not should_close:
+            return
+        
+        self._close_position(
+            pd.Timestamp(timestamp),
+            current_price,
+            reason
+        )
+        
+        if verbose:
+            log.info(f"Closed position at ${current_price:.2f} ({reason})")
+    
+    def _handle_signal(
+        self,
+        signal: Signal,
+        timestamp: int,
+        current_price: float,
+        verbose: bool
+    ):
+        """Execute a trade based on signal and record equity for the bar"""
+        if signal == Signal.BUY and self.position_size == 0:
+            # Calculate position size
+            position_value = self.cash * 0.95  # Use 95% of available cash
+            amount = position_value / current_price
             
-            elif signal == Signal.SELL and self.position_size == 0:
-                # For simplicity, we skip short positions in backtest
-                # Could be implemented for futures trading
-                pass
+            self._open_position(
+                pd.Timestamp(timestamp),
+                'long',
+                amount,
+                current_price
+            )
             
-            # Record equity
-            portfolio_value = self._calculate_portfolio_value(current_price)
-            self.equity_curve.append({
-                'timestamp': timestamp,
-                'equity': portfolio_value,
-                'cash': self.cash,
-                'position_value': self.position_size * current_price if self.position_size > 0 else 0
-            })
+            if verbose:
+                log.info(f"Opened LONG at ${current_price:.2f} | Amount: {amount:.4f}")
         
+        elif signal == Signal.SELL and self.position_size == 0:
+            # For simplicity, we skip short positions in backtest
+            # Could be implemented for futures trading
+            pass
+        
+        # Record equity
+        portfolio_value = self._calculate_portfolio_value(current_price)
+        self.equity_curve.append({
+            'timestamp': timestamp,
+            'equity': portfolio_value,
+            'cash': self.cash,
+            'position_value': self.position_size * current_price if self.position_size > 0 else 0
+        })
+    
+    def _finish(self, data: pd.DataFrame, ts_values: np.ndarray) -> Dict:
+        """Close any open position and build the results"""
         # Close any open position at the end
         if self.position_size > 0:
             final_price = data['close'].iloc[-1]
-            final_timestamp = data.index[-1] if isinstance(data.index, pd.DatetimeIndex) else datetime.utcnow()
+            final_timestamp = pd.Timestamp(ts_values[-1])
             self._close_position(final_timestamp, final_price, "backtest_end")
         
         # Calculate performance metrics
@@ -174,8 +257,8 @@ class BacktestEngine:
     ):
         """Open a position"""
         cost = amount * price
-        fee = cost * self.commission
-        total_cost = cost + fee
+        total_cost = cost * self._buy_mult
+        fee = total_cost - cost
         
         if total_cost > self.cash:
             log.warning(f"Insufficient cash for position: ${total_cost:.2f} > ${self.cash:.2f}")
@@ -211,8 +294,8 @@ class BacktestEngine:
             return
         
         proceeds = self.position_size * price
-        fee = proceeds * self.commission
-        net_proceeds = proceeds - fee
+        net_proceeds = proceeds * self._sell_mult
+        fee = proceeds - net_proceeds
         
         # Calculate P&L
         cost = self.position_size * self.position_entry_price
@@ -257,6 +340,7 @@ class BacktestEngine:
         
         if not equity_df.empty:
             equity_df.set_index('timestamp', inplace=True)
+            equity_df.index = pd.to_datetime(equity_df.index)
         
         calculator = PerformanceCalculator(
             trades=self.trades,
@@ -279,9 +363,14 @@ class BacktestEngine:
             for t in self.trades
         ]
         
-        # Add equity curve
+        # Add equity curve as columnar arrays (timestamps in epoch nanoseconds)
         if not equity_df.empty:
-            metrics['equity_curve'] = equity_df.to_dict('records')
+            metrics['equity_curve'] = {
+                'timestamp': pd.DatetimeIndex(equity_df.index).astype('int64').tolist(),
+                'equity': equity_df['equity'].tolist(),
+                'cash': equity_df['cash'].tolist(),
+                'position_value': equity_df['position_value'].tolist()
+            }
         
         return metrics
 
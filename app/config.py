@@ -27,6 +27,7 @@ class Settings(BaseSettings):
     risk_per_trade: float = 0.02
     max_daily_loss: float = 500.0
     max_open_positions: int = 5
+    max_concurrent_strategies: int = 10  # strategies analyzed in parallel per tick
     
     # Exchange API Keys
     binance_api_key: str = ""
@@ -34,6 +35,10 @@ class Settings(BaseSettings):
     bybit_api_key: str = ""
     bybit_api_secret: str = ""
     
+    # Exchange markets cache (skips load_markets() while fresh)
+    markets_cache_dir: str = "data/markets"
+    markets_cache_ttl: int = 86400  # 24 hours
+    
     # Database
     database_url: str = "sqlite+aiosqlite:///./trading.db"
     
@@ -2,8 +2,9 @@
 Cache manager for AI analysis using Redis
 """
 import json
+import time
 from typing import Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 import asyncio
 
 try:
@@ -74,15 +75,9 @@ class CacheManager:
             cached = await self.redis_client.get(key)
             
             if cached:
-                data = json.loads(cached)
-                
-                # Check if stale (additional validation)
-                if self._is_stale(data):
-                    await self.redis_client.delete(key)
-                    return None
-                
+                # Expiry is enforced by the SETEX TTL; no need to re-check here
                 log.info(f"Cache HIT: {key}")
-                return data
+                return json.loads(cached)
             
             log.info(f"Cache MISS: {key}")
             return None
@@ -112,8 +107,8 @@ class CacheManager:
             return False
         
         try:
-            # Add timestamp to cached data
-            data['cached_at'] = datetime.utcnow().isoformat()
+            # Add timestamp (epoch seconds) to cached data
+            data['cached_at'] = time.time()
             
             ttl = ttl or self.default_ttl
             
@@ -170,22 +165,29 @@ class CacheManager:
     
     def _is_stale(self, data: Dict, max_age_seconds: int = 14400) -> bool:
         """
-        Check if cached data is stale
+        Check if cached data is stale.
+        
+        Not used on the read path (Redis TTL handles expiry); kept for
+        offline audits of cached payloads.
         
         Args:
-            data: Cached data with 'cached_at' timestamp
+            data: Cached data with 'cached_at' timestamp (epoch seconds,
+                or an ISO string written by older versions)
             max_age_seconds: Maximum age in seconds
         
         Returns:
             True if data is stale
         """
-        if 'cached_at' not in data:
+        cached_at = data.get('cached_at')
+        if cached_at is None:
             return True
         
         try:
-            cached_at = datetime.fromisoformat(data['cached_at'])
-            age_seconds = (datetime.utcnow() - cached_at).total_seconds()
-            return age_seconds > max_age_seconds
+            if isinstance(cached_at, str):
+                cached_at = datetime.fromisoformat(cached_at).replace(
+                    tzinfo=timezone.utc
+                ).timestamp()
+            return (time.time() - float(cached_at)) > max_age_seconds
             
         except Exception:
             return True
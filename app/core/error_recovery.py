@@ -2,48 +2,82 @@
 Error recovery and circuit breaker for trading bot
 """
 import asyncio
-from typing import Optional, Dict, Callable, Any
-from datetime import datetime, timedelta
-from enum import Enum
+import hashlib
+import math
+import random
+import time
+import uuid
+from collections import deque
+from typing import Optional, Dict, Callable, Any, Tuple, NamedTuple
+from enum import IntEnum
 
+from app.core import metrics
 from app.utils.logger import log
 
 
-class CircuitState(Enum):
+class CircuitState(IntEnum):
     """Circuit breaker states"""
-    CLOSED = "closed"  # Normal operation
-    OPEN = "open"      # Too many failures, reject requests
-    HALF_OPEN = "half_open"  # Testing if service recovered
+    CLOSED = 0  # Normal operation
+    OPEN = 1    # Too many failures, reject requests
+    HALF_OPEN = 2  # Testing if service recovered
 
 
 class CircuitBreaker:
     """
     Circuit breaker pattern to prevent cascading failures
+    
+    State transitions happen in synchronous code between awaits, so they are
+    atomic with respect to other coroutines on the event loop.
     """
+    __slots__ = (
+        'failure_threshold', 'recovery_timeout', 'expected_exception', 'name',
+        '_state_metric', '_failures_metric', '_transition_metrics',
+        'failure_count', 'last_failure_time', 'state', '_half_open_probe_active'
+    )
     
     def __init__(
         self,
         failure_threshold: int = 5,
         recovery_timeout: int = 60,
-        expected_exception: type = Exception
+        expected_exception: type = Exception,
+        name: str = "default"
     ):
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
         self.expected_exception = expected_exception
+        self.name = name
+        
+        # Metric samples resolved once so updates are plain attribute writes
+        self._state_metric = metrics.circuit_state.labels(name)
+        self._failures_metric = metrics.circuit_failures.labels(name)
+        self._transition_metrics = {
+            state: metrics.circuit_transitions.labels(name, state.name.lower())
+            for state in CircuitState
+        }
         
         self.failure_count = 0
-        self.last_failure_time: Optional[datetime] = None
+        self.last_failure_time: Optional[float] = None  # time.monotonic()
         self.state = CircuitState.CLOSED
+        self._state_metric.set(CircuitState.CLOSED)
+        
+        # Only one caller may probe the service while HALF_OPEN
+        self._half_open_probe_active = False
     
     async def call(self, func: Callable, *args, **kwargs) -> Any:
         """Execute function with circuit breaker protection"""
         if self.state == CircuitState.OPEN:
             if self._should_attempt_reset():
-                self.state = CircuitState.HALF_OPEN
+                self._set_state(CircuitState.HALF_OPEN)
                 log.info("Circuit breaker entering HALF_OPEN state")
             else:
                 raise Exception("Circuit breaker is OPEN")
         
+        probing = False
+        if self.state == CircuitState.HALF_OPEN:
+            if self._half_open_probe_active:
+                raise Exception("Circuit breaker is probing")
+            self._half_open_probe_active = probing = True
+        
         try:
             result = await func(*args, **kwargs)
             self._on_success()
@@ -52,6 +86,10 @@ class CircuitBreaker:
         except self.expected_exception as e:
             self._on_failure()
             raise e
+        
+        finally:
+            if probing:
+                self._half_open_probe_active = False
     
     def _on_success(self):
         """Handle successful execution"""
@@ -59,39 +97,54 @@ class CircuitBreaker:
             log.info("Circuit breaker recovered, returning to CLOSED state")
         
         self.failure_count = 0
-        self.state = CircuitState.CLOSED
+        self._set_state(CircuitState.CLOSED)
     
     def _on_failure(self):
         """Handle failed execution"""
         self.failure_count += 1
-        self.last_failure_time = datetime.utcnow()
+        self.last_failure_time = time.monotonic()
+        self._failures_metric.inc()
         
-        if self.failure_count >= self.failure_threshold:
-            self.state = CircuitState.OPEN
+        if self.state == CircuitState.HALF_OPEN:
+            self._set_state(CircuitState.OPEN)
+            log.error(
+                f"Circuit breaker probe failed. "
+                f"Re-entering OPEN state for {self.recovery_timeout}s"
+            )
+        elif self.failure_count >= self.failure_threshold and self.state != CircuitState.OPEN:
+            self._set_state(CircuitState.OPEN)
             log.error(
                 f"Circuit breaker tripped! {self.failure_count} failures. "
                 f"Entering OPEN state for {self.recovery_timeout}s"
             )
     
+    def _set_state(self, state: CircuitState):
+        """Transition to a new state and record it"""
+        if state == self.state:
+            return
+        self.state = state
+        self._state_metric.set(state)
+        self._transition_metrics[state].inc()
+    
     def _should_attempt_reset(self) -> bool:
         """Check if we should try to recover"""
-        if not self.last_failure_time:
+        if self.last_failure_time is None:
             return False
         
-        elapsed = (datetime.utcnow() - self.last_failure_time).total_seconds()
-        return elapsed >= self.recovery_timeout
+        return time.monotonic() - self.last_failure_time >= self.recovery_timeout
     
     def reset(self):
         """Manually reset the circuit breaker"""
         self.failure_count = 0
-        self.state = CircuitState.CLOSED
+        self._set_state(CircuitState.CLOSED)
         self.last_failure_time = None
+        self._half_open_probe_active = False
         log.info("Circuit breaker manually reset")
 
 
 class RetryPolicy:
     """
-    Retry policy with exponential backoff
+    Retry policy with jittered exponential backoff
     """
     
     def __init__(
@@ -99,12 +152,32 @@ class RetryPolicy:
         max_attempts: int = 3,
         initial_delay: float = 1.0,
         max_delay: float = 60.0,
-        exponential_base: float = 2.0
+        exponential_base: float = 2.0,
+        jitter: float = 1.0,
+        errors_to_retry: Tuple[type, ...] = (Exception,),
+        non_retryable: Tuple[type, ...] = ()
     ):
+        """
+        Args:
+            jitter: Fraction of each backoff that is randomized
+                (1.0 = full jitter, 0.5 = equal jitter, 0.0 = none)
+            errors_to_retry: Exception types that trigger a retry
+            non_retryable: Subtypes of errors_to_retry that are raised
+                immediately (e.g. authentication or insufficient funds)
+        """
         self.max_attempts = max_attempts
         self.initial_delay = initial_delay
         self.max_delay = max_delay
         self.exponential_base = exponential_base
+        self.jitter = jitter
+        self.errors_to_retry = errors_to_retry
+        self.non_retryable = non_retryable
+        
+        # Backoff cap before each retry, computed once
+        self._delays = [
+            min(initial_delay * (exponential_base ** attempt), max_delay)
+            for attempt in range(max(max_attempts - 1, 0))
+        ]
     
     async def execute(
         self,
@@ -124,18 +197,20 @@ class RetryPolicy:
                 
                 return result
                 
-            except Exception as e:
+            except self.errors_to_retry as e:
+                if isinstance(e, self.non_retryable):
+                    log.error(f"Non-retryable error: {e}")
+                    raise
+                
                 last_exception = e
                 
                 if attempt < self.max_attempts - 1:
-                    delay = min(
-                        self.initial_delay * (self.exponential_base ** attempt),
-                        self.max_delay
-                    )
+                    backoff = self._delays[attempt]
+                    delay = backoff * (1 - self.jitter) + random.uniform(0, backoff * self.jitter)
                     
                     log.warning(
                         f"Attempt {attempt + 1}/{self.max_attempts} failed: {e}. "
-                        f"Retrying in {delay}s..."
+                        f"Retrying in {delay:.2f}s..."
                     )
                     
                     await asyncio.sleep(delay)
@@ -145,40 +220,179 @@ class RetryPolicy:
         raise last_exception
 
 
+class CountMinSketch:
+    """
+    Approximate rolling counter for an unbounded set of keys
+    
+    Counts are kept in a ring of time buckets, each holding a depth x width
+    Count-Min table, so memory is fixed regardless of how many keys are seen.
+    Estimates never undercount and overcount only on hash collisions.
+    """
+    
+    def __init__(
+        self,
+        window_size: int,
+        bucket_seconds: int = 60,
+        width: int = 256,
+        depth: int = 4
+    ):
+        self.width = width
+        self.depth = depth
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = max(1, int(window_size // bucket_seconds))
+        
+        # Absolute bucket index held by each ring slot (-1 = empty)
+        self._epochs = [-1] * self.num_buckets
+        self._tables = [
+            [[0] * width for _ in range(depth)]
+            for _ in range(self.num_buckets)
+        ]
+    
+    def _columns(self, key: str) -> list:
+        # One independent 32-bit slice of the digest per row; columns derived
+        # from hash((row, key)) are correlated across rows and collide together
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        return [
+            int.from_bytes(digest[4 * row:4 * row + 4], 'little') % self.width
+            for row in range(self.depth)
+        ]
+    
+    def add(self, key: str, now: float, amount: int = 1):
+        """Add an occurrence of key at monotonic time now"""
+        epoch = int(now // self.bucket_seconds)
+        slot = epoch % self.num_buckets
+        table = self._tables[slot]
+        
+        if self._epochs[slot] != epoch:
+            # Slot is being reused for a new bucket, drop stale counts
+            self._epochs[slot] = epoch
+            for row in table:
+                row[:] = [0] * self.width
+        
+        for row, col in enumerate(self._columns(key)):
+            table[row][col] += amount
+    
+    def estimate(self, key: str, now: float) -> int:
+        """Estimated occurrences of key within the window"""
+        oldest = int(now // self.bucket_seconds) - self.num_buckets + 1
+        live = [
+            table for table, epoch in zip(self._tables, self._epochs)
+            if epoch >= oldest
+        ]
+        if not live:
+            return 0
+        
+        return min(
+            sum(table[row][col] for table in live)
+            for row, col in enumerate(self._columns(key))
+        )
+    
+    def clear(self):
+        """Reset all counts"""
+        self._epochs = [-1] * self.num_buckets
+        for table in self._tables:
+            for row in table:
+                row[:] = [0] * self.width
+
+
+class ErrorRecord(NamedTuple):
+    """Single error occurrence"""
+    ts: float  # time.monotonic()
+    details: str
+
+
 class ErrorTracker:
     """
     Track errors and their frequency
+    
+    The first max_types error types are tracked exactly; further types are
+    counted approximately in a fixed-size CountMinSketch.
     """
     
-    def __init__(self, window_size: int = 3600):
+    def __init__(
+        self,
+        window_size: int = 3600,
+        max_entries_per_type: int = 10000,
+        max_types: int = 256
+    ):
         """
         Args:
             window_size: Time window in seconds for tracking errors
+            max_entries_per_type: Cap on stored occurrences per error type
+            max_types: Number of error types tracked exactly
         """
         self.window_size = window_size
-        self.errors: Dict[str, list] = {}
+        self.max_entries_per_type = max_entries_per_type
+        self.max_types = max_types
+        # error_type -> deque of ErrorRecord, oldest first
+        self.errors: Dict[str, deque] = {}
+        self.overflow = CountMinSketch(window_size, bucket_seconds=max(1, window_size // 60))
+        # error_type -> deque of attempt timestamps, for failure ratios
+        self.attempts: Dict[str, deque] = {}
     
     def record_error(self, error_type: str, details: str = ""):
-        """Record an error occurrence"""
-        now = datetime.utcnow()
+        """
+        Record an error occurrence
+        
+        Only appends; expired entries are dropped when counts are read, and
+        max_entries_per_type bounds memory in between.
+        """
+        now = time.monotonic()
         
         if error_type not in self.errors:
-            self.errors[error_type] = []
+            if len(self.errors) >= self.max_types:
+                self._expire_empty_types(now)
+            
+            if len(self.errors) >= self.max_types:
+                # Types that only fit in the sketch share one metric series too
+                self.overflow.add(error_type, now)
+                metrics.errors_total.labels(metrics.OVERFLOW_LABEL).inc()
+                return
+            
+            self.errors[error_type] = deque(maxlen=self.max_entries_per_type)
+        
+        metrics.errors_total.labels(error_type).inc()
+        self.errors[error_type].append(ErrorRecord(now, details))
+    
+    def record_attempt(self, error_type: str):
+        """Record an operation that may fail with error_type"""
+        attempts = self.attempts.get(error_type)
+        if attempts is None:
+            attempts = self.attempts[error_type] = deque(maxlen=self.max_entries_per_type)
+        attempts.append(time.monotonic())
+    
+    def rate_in_last(self, error_type: str, seconds: float, min_attempts: int = 1) -> float:
+        """
+        Fraction of attempts in the last seconds that failed with error_type
         
-        self.errors[error_type].append({
-            "timestamp": now,
-            "details": details
-        })
+        Returns 0.0 while fewer than min_attempts were recorded in that window.
+        """
+        cutoff = time.monotonic() - seconds
         
-        # Clean old errors outside window
-        self._clean_old_errors(error_type, now)
+        attempt_count = 0
+        for ts in reversed(self.attempts.get(error_type, ())):
+            if ts <= cutoff:
+                break
+            attempt_count += 1
+        
+        if attempt_count < max(min_attempts, 1):
+            return 0.0
+        
+        error_count = 0
+        for record in reversed(self.errors.get(error_type, ())):
+            if record.ts <= cutoff:
+                break
+            error_count += 1
+        
+        return min(error_count / attempt_count, 1.0)
     
     def get_error_count(self, error_type: str) -> int:
         """Get count of errors within the time window"""
+        now = time.monotonic()
+        
         if error_type not in self.errors:
-            return 0
+            return self.overflow.estimate(error_type, now)
         
-        now = datetime.utcnow()
         self._clean_old_errors(error_type, now)
         
         return len(self.errors[error_type])
@@ -189,32 +403,49 @@ class ErrorTracker:
         return count / (self.window_size / 60)
     
     def get_all_errors(self) -> Dict[str, int]:
-        """Get counts for all error types"""
-        return {
-            error_type: self.get_error_count(error_type)
-            for error_type in self.errors.keys()
-        }
+        """Get counts for all error types, dropping types with none left"""
+        cutoff = time.monotonic() - self.window_size
+        counts = {}
+        
+        for error_type, entries in list(self.errors.items()):
+            while entries and entries[0].ts <= cutoff:
+                entries.popleft()
+            if entries:
+                counts[error_type] = len(entries)
+            else:
+                del self.errors[error_type]
+        
+        return counts
     
-    def _clean_old_errors(self, error_type: str, now: datetime):
+    def _clean_old_errors(self, error_type: str, now: float):
         """Remove errors outside the time window"""
-        if error_type not in self.errors:
+        entries = self.errors.get(error_type)
+        if not entries:
             return
         
-        cutoff = now - timedelta(seconds=self.window_size)
-        self.errors[error_type] = [
-            err for err in self.errors[error_type]
-            if err["timestamp"] > cutoff
-        ]
+        cutoff = now - self.window_size
+        while entries and entries[0][0] <= cutoff:
+            entries.popleft()
+    
+    def _expire_empty_types(self, now: float):
+        """Drop error types with no occurrences left in the window"""
+        for error_type in list(self.errors):
+            self._clean_old_errors(error_type, now)
+            if not self.errors[error_type]:
+                del self.errors[error_type]
     
     def clear(self):
         """Clear all error history"""
         self.errors.clear()
+        self.attempts.clear()
+        self.overflow.clear()
 
 
 class RateLimiter:
     """
     Rate limiter to prevent API throttling
     """
+    __slots__ = ('max_calls', 'time_window', 'calls')
     
     def __init__(self, max_calls: int, time_window: int):
         """
@@ -224,29 +455,25 @@ class RateLimiter:
         """
         self.max_calls = max_calls
         self.time_window = time_window
-        self.calls = []
+        self.calls: deque = deque()  # monotonic timestamps, oldest first
     
     async def acquire(self):
         """Wait if necessary to respect rate limit"""
-        now = datetime.utcnow()
-        
-        # Remove old calls outside window
-        cutoff = now - timedelta(seconds=self.time_window)
-        self.calls = [call for call in self.calls if call > cutoff]
-        
-        # Check if we need to wait
-        if len(self.calls) >= self.max_calls:
-            # Calculate wait time
-            oldest_call = min(self.calls)
-            wait_until = oldest_call + timedelta(seconds=self.time_window)
-            wait_seconds = (wait_until - now).total_seconds()
+        while True:
+            now = time.monotonic()
             
-            if wait_seconds > 0:
-                log.debug(f"Rate limit reached, waiting {wait_seconds:.2f}s")
-                await asyncio.sleep(wait_seconds)
-                
-                # Retry acquire after waiting
-                return await self.acquire()
+            # Drop calls that fell out of the window
+            cutoff = now - self.time_window
+            while self.calls and self.calls[0] <= cutoff:
+                self.calls.popleft()
+            
+            if len(self.calls) < self.max_calls:
+                break
+            
+            # Wait until the oldest call leaves the window
+            wait_seconds = self.calls[0] + self.time_window - now
+            log.debug(f"Rate limit reached, waiting {wait_seconds:.2f}s")
+            await asyncio.sleep(wait_seconds)
         
         # Record this call
         self.calls.append(now)
@@ -255,3 +482,275 @@ class RateLimiter:
         """Reset the rate limiter"""
         self.calls.clear()
 
+
+class TokenBucket:
+    """
+    Token bucket rate limiter that allows bursts up to capacity
+    
+    Callers reserve tokens up front (the balance may go negative) and sleep
+    off their own deficit, so concurrent callers are served in order
+    without a lock.
+    """
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated_at')
+    
+    def __init__(self, capacity: float, rate: float):
+        """
+        Args:
+            capacity: Maximum burst size in tokens
+            rate: Tokens refilled per second
+        """
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+    
+    async def acquire(self, cost: float = 1):
+        """Take cost tokens, waiting for the bucket to refill if needed"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        
+        self.tokens -= cost
+        if self.tokens < 0:
+            wait_seconds = -self.tokens / self.rate
+            log.debug(f"Rate limit reached, waiting {wait_seconds:.2f}s")
+            await asyncio.sleep(wait_seconds)
+    
+    def reset(self):
+        """Refill the bucket"""
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+
+
+# Sliding-window counter packed into one integer:
+#   bits 40-51 window index (mod 4096) | bits 20-39 previous count | bits 0-19 current count
+# Returns {1, 0} when the call is allowed, else {0, wait_ms}.
+_SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local max_calls = tonumber(ARGV[3])
+
+local cur_window = math.floor(now / window)
+local tag = cur_window % 4096
+local packed = tonumber(redis.call('GET', KEYS[1]) or '0')
+
+local stored_tag = math.floor(packed / 1099511627776)
+local prev = math.floor(packed / 1048576) % 1048576
+local curr = packed % 1048576
+
+if packed == 0 or stored_tag ~= tag then
+    if packed ~= 0 and stored_tag == (cur_window - 1) % 4096 then
+        prev = curr
+    else
+        prev = 0
+    end
+    curr = 0
+end
+
+local elapsed = (now % window) / window
+if prev * (1 - elapsed) + curr >= max_calls then
+    local wait = (1 - elapsed) * window
+    if prev > 0 and curr < max_calls then
+        wait = math.min(wait, (1 - (max_calls - curr) / prev - elapsed) * window)
+    end
+    return {0, math.ceil(wait * 1000)}
+end
+
+curr = curr + 1
+redis.call('SET', KEYS[1], string.format('%.0f', tag * 1099511627776 + prev * 1048576 + curr),
+           'PX', math.ceil(window * 2000))
+return {1, 0}
+"""
+
+
+class RedisRateLimiter:
+    """
+    Rate limiter shared by every process using the same Redis key
+    
+    Uses a sliding-window counter (weighted previous window + current
+    window) packed into a single integer and updated by one Lua script, so
+    each acquire is one round-trip and the key space is one key per limiter.
+    """
+    
+    MAX_CALLS_LIMIT = 1048575  # 20-bit per-window counter
+    
+    def __init__(self, redis_client, key: str, max_calls: int, time_window: int):
+        """
+        Args:
+            redis_client: redis.asyncio client
+            key: Redis key shared by all limiter instances
+            max_calls: Maximum number of calls allowed
+            time_window: Time window in seconds
+        """
+        if max_calls > self.MAX_CALLS_LIMIT:
+            raise ValueError(f"max_calls must be <= {self.MAX_CALLS_LIMIT}")
+        
+        self.redis = redis_client
+        self.key = key
+        self.max_calls = max_calls
+        self.time_window = time_window
+        self._script = redis_client.register_script(_SLIDING_WINDOW_LUA)
+    
+    async def acquire(self):
+        """Wait if necessary to respect the global rate limit"""
+        while True:
+            allowed, wait_ms = await self._script(
+                keys=[self.key],
+                args=[time.time(), self.time_window, self.max_calls]
+            )
+            
+            if int(allowed):
+                return
+            
+            wait_seconds = int(wait_ms) / 1000
+            log.debug(f"Global rate limit reached, waiting {wait_seconds:.2f}s")
+            await asyncio.sleep(max(wait_seconds, 0.01))
+    
+    async def reset(self):
+        """Reset the rate limiter"""
+        await self.redis.delete(self.key)
+
+
+# Deletes the probe lock only if it still holds this caller's token, so a
+# probe that outlived the lock's expiry cannot release another one's lock
+_RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisCircuitBreaker(CircuitBreaker):
+    """
+    Circuit breaker whose state is shared through Redis
+    
+    Failure counts and the open timestamp live in a Redis hash; each process
+    re-reads them at most every local_ttl seconds. A SET NX key ensures only
+    one process probes the service while HALF_OPEN.
+    """
+    __slots__ = (
+        'redis', 'key', 'probe_key', 'local_ttl',
+        '_opened_at', '_last_refresh', '_pending', '_release_probe'
+    )
+    
+    def __init__(
+        self,
+        redis_client,
+        key: str,
+        failure_threshold: int = 5,
+        recovery_timeout: int = 60,
+        expected_exception: type = Exception,
+        local_ttl: float = 1.0,
+        name: str = "default"
+    ):
+        super().__init__(failure_threshold, recovery_timeout, expected_exception, name)
+        self.redis = redis_client
+        self.key = key
+        self.probe_key = f"{key}:probe"
+        self.local_ttl = local_ttl
+        
+        self._opened_at: Optional[float] = None  # wall-clock, shared across processes
+        self._last_refresh = 0.0
+        self._pending: set = set()
+        self._release_probe = redis_client.register_script(_RELEASE_LOCK_LUA)
+    
+    async def _refresh(self):
+        """Reload shared state if the local copy is older than local_ttl"""
+        now = time.monotonic()
+        if now - self._last_refresh < self.local_ttl or self._half_open_probe_active:
+            # While this process probes, the probe's outcome decides the state
+            return
+        self._last_refresh = now
+        
+        data = await self.redis.hgetall(self.key)
+        self.failure_count = int(data.get('failures', 0) or 0)
+        opened_at = data.get('opened_at')
+        self._opened_at = float(opened_at) if opened_at else None
+        self._set_state(CircuitState.OPEN if self._opened_at else CircuitState.CLOSED)
+    
+    async def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Execute function with shared circuit breaker protection"""
+        await self._refresh()
+        
+        # Like CircuitBreaker.call, only the probe may reach the service while HALF_OPEN
+        if self.state == CircuitState.HALF_OPEN or self._half_open_probe_active:
+            raise Exception("Circuit breaker is probing")
+        
+        probe_token = None
+        if self.state == CircuitState.OPEN:
+            if time.time() - self._opened_at < self.recovery_timeout:
+                raise Exception("Circuit breaker is OPEN")
+            
+            probe_token = uuid.uuid4().hex
+            acquired = await self.redis.set(
+                self.probe_key, probe_token, nx=True, ex=math.ceil(self.recovery_timeout)
+            )
+            if not acquired:
+                raise Exception("Circuit breaker is probing")
+            self._half_open_probe_active = True
+            self._set_state(CircuitState.HALF_OPEN)
+            log.info("Circuit breaker entering HALF_OPEN state")
+        
+        try:
+            result = await func(*args, **kwargs)
+            if probe_token or self.failure_count:
+                await self._record_success()
+            return result
+        
+        except self.expected_exception as e:
+            self.failure_count += 1
+            self._failures_metric.inc()
+            if probe_token:
+                # Re-open before anyone else runs, or the next caller would
+                # slip through and its success would close the shared circuit
+                await self._record_failure(probing=True)
+                self._opened_at = time.time()
+                self._set_state(CircuitState.OPEN)
+                log.error(
+                    f"Circuit breaker probe failed. "
+                    f"Re-entering OPEN state for {self.recovery_timeout}s"
+                )
+            else:
+                task = asyncio.create_task(self._record_failure(probing=False))
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+            raise e
+        
+        finally:
+            if probe_token:
+                self._half_open_probe_active = False
+                await self._release_probe(keys=[self.probe_key], args=[probe_token])
+    
+    async def _record_success(self):
+        """Clear shared failure state"""
+        if self.state == CircuitState.HALF_OPEN:
+            log.info("Circuit breaker recovered, returning to CLOSED state")
+        await self.redis.delete(self.key)
+        self.failure_count = 0
+        self._opened_at = None
+        self._set_state(CircuitState.CLOSED)
+    
+    async def _record_failure(self, probing: bool):
+        """Increment the shared failure count and open the circuit if needed"""
+        try:
+            failures = await self.redis.hincrby(self.key, 'failures', 1)
+            if probing or failures >= self.failure_threshold:
+                # Re-open from a failed probe; otherwise keep the first open time
+                if probing:
+                    await self.redis.hset(self.key, 'opened_at', time.time())
+                elif await self.redis.hsetnx(self.key, 'opened_at', time.time()):
+                    log.error(
+                        f"Circuit breaker tripped! {failures} failures. "
+                        f"Entering OPEN state for {self.recovery_timeout}s"
+                    )
+            await self.redis.expire(self.key, max(math.ceil(self.recovery_timeout) * 10, 60))
+            self._last_refresh = 0.0
+        except Exception as e:
+            log.warning(f"Could not record circuit breaker failure: {e}")
+    
+    async def reset_shared(self):
+        """Manually reset the circuit breaker for every process"""
+        await self.redis.delete(self.key, self.probe_key)
+        self._opened_at = None
+        self.reset()
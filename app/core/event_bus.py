@@ -2,9 +2,10 @@
 Event bus for strategy signals and system events
 """
 import asyncio
-from typing import Dict, List, Callable, Any
+import time
+from typing import Dict, List, Callable, Any, Tuple
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from app.utils.logger import log
 
@@ -39,34 +40,65 @@ class EventType(Enum):
     RISK_LIMIT_HIT = "risk_limit_hit"
 
 
-@dataclass
+# Sentinel pushed onto the queue to stop the processor
+_SHUTDOWN = object()
+
+
+@dataclass(slots=True)
 class Event:
     """Event data structure"""
     event_type: EventType
     data: Dict[str, Any]
-    timestamp: datetime = None
+    timestamp: int = field(default_factory=time.time_ns)  # epoch nanoseconds
     source: str = ""
     
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.utcnow()
+    @property
+    def created_at(self) -> datetime:
+        """Event time as a naive UTC datetime"""
+        return datetime.utcfromtimestamp(self.timestamp / 1e9)
 
 
 class EventBus:
-    """Event bus for pub/sub pattern"""
+    """
+    Event bus for pub/sub pattern
     
-    def __init__(self):
+    Each subscribed event type has its own queue and worker task, so a busy
+    event stream never delays delivery of other event types. Publishing only
+    enqueues, so publishers never wait on subscriber code unless a queue is
+    full.
+    """
+    
+    def __init__(self, max_queue_size: int = 4096):
+        """
+        Args:
+            max_queue_size: Events buffered per type before publishers wait
+        """
+        self.max_queue_size = max_queue_size
         self.subscribers: Dict[EventType, List[Callable]] = {}
-        self.event_queue: asyncio.Queue = asyncio.Queue()
+        self.queues: Dict[EventType, asyncio.Queue] = {}
+        self.workers: Dict[EventType, asyncio.Task] = {}
         self.running = False
-        self.processor_task: asyncio.Task = None
+        
+        # (async callbacks, sync callbacks) per type, rebuilt on (un)subscribe
+        self._callbacks: Dict[EventType, Tuple[Tuple[Callable, ...], Tuple[Callable, ...]]] = {}
     
     def subscribe(self, event_type: EventType, callback: Callable):
-        """Subscribe to an event type"""
+        """
+        Subscribe to an event type
+        
+        Coroutine callbacks run on the event loop; plain callbacks run in
+        the default thread pool executor.
+        """
         if event_type not in self.subscribers:
             self.subscribers[event_type] = []
+            self.queues[event_type] = asyncio.Queue(maxsize=self.max_queue_size)
         
         self.subscribers[event_type].append(callback)
+        self._rebuild_callbacks(event_type)
+        
+        if self.running and event_type not in self.workers:
+            self._start_worker(event_type)
+        
         log.debug(f"Subscribed to {event_type.value}")
     
     def unsubscribe(self, event_type: EventType, callback: Callable):
@@ -74,13 +106,34 @@ class EventBus:
         if event_type in self.subscribers:
             try:
                 self.subscribers[event_type].remove(callback)
+                self._rebuild_callbacks(event_type)
                 log.debug(f"Unsubscribed from {event_type.value}")
             except ValueError:
                 pass
     
+    def _rebuild_callbacks(self, event_type: EventType):
+        """Split subscribers into coroutine and plain callbacks once"""
+        callbacks = self.subscribers[event_type]
+        self._callbacks[event_type] = (
+            tuple(cb for cb in callbacks if asyncio.iscoroutinefunction(cb)),
+            tuple(cb for cb in callbacks if not asyncio.iscoroutinefunction(cb))
+        )
+    
     async def publish(self, event: Event):
         """Publish an event to the bus"""
-        await self.event_queue.put(event)
+        queue = self.queues.get(event.event_type)
+        if queue is None:
+            # Nobody listens to this event type
+            return
+        
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            if not self.running:
+                log.warning(f"Event queue full, dropping {event.event_type.value} event")
+                return
+            # Apply backpressure rather than grow without bound
+            await queue.put(event)
         log.debug(f"Published event: {event.event_type.value}")
     
     async def emit(self, event_type: EventType, data: Dict[str, Any], source: str = ""):
@@ -88,53 +141,73 @@ class EventBus:
         event = Event(event_type=event_type, data=data, source=source)
         await self.publish(event)
     
-    async def _process_events(self):
-        """Process events from the queue"""
-        while self.running:
+    async def _process_events(self, event_type: EventType):
+        """Process events from the queue of one event type"""
+        queue = self.queues[event_type]
+        
+        while True:
+            event = await queue.get()
             try:
-                # Get event from queue with timeout
-                event = await asyncio.wait_for(
-                    self.event_queue.get(),
-                    timeout=1.0
-                )
+                if event is _SHUTDOWN:
+                    break
                 
-                # Call all subscribers for this event type
-                if event.event_type in self.subscribers:
-                    callbacks = self.subscribers[event.event_type]
-                    
-                    # Execute callbacks
-                    for callback in callbacks:
-                        try:
-                            if asyncio.iscoroutinefunction(callback):
-                                await callback(event)
-                            else:
-                                callback(event)
-                        except Exception as e:
-                            log.error(f"Error in event callback: {e}")
+                async_callbacks, sync_callbacks = self._callbacks[event_type]
+                if async_callbacks or sync_callbacks:
+                    await self._dispatch(event, async_callbacks, sync_callbacks)
                 
-            except asyncio.TimeoutError:
-                continue
             except Exception as e:
                 log.error(f"Error processing event: {e}")
+            finally:
+                queue.task_done()
+    
+    async def _dispatch(
+        self,
+        event: Event,
+        async_callbacks: Tuple[Callable, ...],
+        sync_callbacks: Tuple[Callable, ...]
+    ):
+        """Run all callbacks for an event concurrently"""
+        loop = asyncio.get_running_loop()
+        
+        results = await asyncio.gather(
+            *(callback(event) for callback in async_callbacks),
+            # Sync callbacks run in the default executor so they can't stall the loop
+            *(loop.run_in_executor(None, callback, event) for callback in sync_callbacks),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                log.error(f"Error in event callback: {result}")
+    
+    def _start_worker(self, event_type: EventType):
+        """Spawn the worker task for an event type"""
+        self.workers[event_type] = asyncio.create_task(self._process_events(event_type))
     
     async def start(self):
-        """Start the event processor"""
+        """Start the event processors"""
         if not self.running:
             self.running = True
-            self.processor_task = asyncio.create_task(self._process_events())
+            for event_type in self.queues:
+                self._start_worker(event_type)
             log.info("Event bus started")
     
     async def stop(self):
-        """Stop the event processor"""
+        """Stop the event processors"""
         if self.running:
             self.running = False
-            if self.processor_task:
-                await self.processor_task
+            for event_type in self.workers:
+                await self.queues[event_type].put(_SHUTDOWN)
+            await asyncio.gather(*self.workers.values())
+            self.workers.clear()
             log.info("Event bus stopped")
     
+    async def flush(self):
+        """Wait until every queued event has been delivered"""
+        await asyncio.gather(*(self.queues[event_type].join() for event_type in self.workers))
+    
     def get_queue_size(self) -> int:
-        """Get current event queue size"""
-        return self.event_queue.qsize()
+        """Get current number of queued events across all types"""
+        return sum(queue.qsize() for queue in self.queues.values())
 
 
 # Global event bus instance
@@ -1,30 +1,89 @@
 """
 Exchange manager using CCXT for unified exchange interface
 """
+import asyncio
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+import aiohttp
 import ccxt.async_support as ccxt
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Callable
 from datetime import datetime
 from app.config import get_settings
+from app.core.error_recovery import CircuitBreaker, RetryPolicy, RateLimiter
 from app.utils.logger import log
 
 settings = get_settings()
 
 
+def _create_session() -> aiohttp.ClientSession:
+    """HTTP session tuned for long-lived exchange connections"""
+    connector = aiohttp.TCPConnector(
+        limit=100,
+        ttl_dns_cache=300,
+        keepalive_timeout=60
+    )
+    return aiohttp.ClientSession(connector=connector, trust_env=True)
+
+
 class ExchangeManager:
     """Manages exchange connections and operations"""
     
-    def __init__(self, exchange_name: str, api_key: str = "", api_secret: str = ""):
+    # ccxt exchange classes resolved by name
+    _exchange_classes: Dict[str, type] = {}
+    
+    def __init__(
+        self,
+        exchange_name: str,
+        api_key: str = "",
+        api_secret: str = "",
+        session: Optional[aiohttp.ClientSession] = None
+    ):
         self.exchange_name = exchange_name.lower()
         self.api_key = api_key
         self.api_secret = api_secret
+        self.session = session
+        self._owns_session = False  # True when initialize() created the session
         self.exchange: Optional[ccxt.Exchange] = None
         self.markets: Dict = {}
         
+        # Flat per-symbol lookups, built from markets
+        self._fee_table: Dict[str, tuple] = {}  # (taker, maker)
+        self._futures_symbols: frozenset = frozenset()
+        self._trading_limits: Dict[str, tuple] = {}  # (min_amount, min_price, price_precision)
+        
+        # Last leverage successfully set per symbol
+        self._leverage_cache: Dict[str, int] = {}
+        
+        # Short-lived tickers for fetch_ticker_cached: symbol -> (monotonic time, ticker)
+        self._ticker_cache: Dict[str, tuple] = {}
+        self._ticker_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        
+        # Resilience for every exchange call (see _safe_call)
+        self._rate_limiter = RateLimiter(max_calls=600, time_window=60)
+        self._circuit_breaker = CircuitBreaker(
+            failure_threshold=5,
+            recovery_timeout=60,
+            expected_exception=ccxt.NetworkError,  # only connectivity problems trip it
+            name=f"exchange:{exchange_name}"
+        )
+        self._retry_policy = RetryPolicy(
+            max_attempts=3,
+            initial_delay=0.5,
+            max_delay=10.0,
+            # Exchange errors (bad symbol, insufficient funds, ...) fail fast
+            errors_to_retry=(ccxt.NetworkError, asyncio.TimeoutError)
+        )
+        
     async def initialize(self):
         """Initialize exchange connection"""
         try:
             # Get exchange class
-            exchange_class = getattr(ccxt, self.exchange_name)
+            exchange_class = self._exchange_classes.get(self.exchange_name)
+            if exchange_class is None:
+                exchange_class = getattr(ccxt, self.exchange_name)
+                self._exchange_classes[self.exchange_name] = exchange_class
             
             # Configure exchange
             config = {
@@ -36,10 +95,24 @@ class ExchangeManager:
                 config['apiKey'] = self.api_key
                 config['secret'] = self.api_secret
             
+            if self.session is None:
+                # Own a pooled session so every call reuses warm connections
+                self.session = _create_session()
+                self._owns_session = True
+            # ccxt leaves sessions it didn't create open on close()
+            config['session'] = self.session
+            
             self.exchange = exchange_class(config)
             
-            # Load markets
-            self.markets = await self.exchange.load_markets()
+            # Load markets, preferring a fresh on-disk copy
+            cached_markets = self._load_cached_markets()
+            if cached_markets:
+                self.markets = self.exchange.set_markets(cached_markets)
+            else:
+                self.markets = await self.exchange.load_markets()
+                self._save_cached_markets(self.markets)
+            
+            self._build_market_tables()
             
             log.info(f"Initialized {self.exchange_name} exchange with {len(self.markets)} markets")
             
@@ -47,22 +120,120 @@ class ExchangeManager:
             log.error(f"Failed to initialize {self.exchange_name}: {e}")
             raise
     
+    def _build_market_tables(self):
+        """Precompute per-symbol lookups from the loaded markets"""
+        # A missing fee falls back to 0.1%; a listed 0.0 fee is kept
+        self._fee_table = {
+            symbol: tuple(
+                0.001 if market.get(side) is None else market[side]
+                for side in ('taker', 'maker')
+            )
+            for symbol, market in self.markets.items()
+        }
+        self._futures_symbols = frozenset(
+            symbol for symbol, market in self.markets.items()
+            if market.get('type') == 'future' or market.get('future')
+        )
+        self._trading_limits = {
+            symbol: (
+                ((market.get('limits') or {}).get('amount') or {}).get('min'),
+                ((market.get('limits') or {}).get('price') or {}).get('min'),
+                (market.get('precision') or {}).get('price')
+            )
+            for symbol, market in self.markets.items()
+        }
+    
+    def _markets_cache_path(self) -> Path:
+        return Path(settings.markets_cache_dir) / f"{self.exchange_name}.json"
+    
+    def _load_cached_markets(self) -> Optional[Dict]:
+        """Load markets from disk if the cache is younger than markets_cache_ttl"""
+        path = self._markets_cache_path()
+        try:
+            if time.time() - path.stat().st_mtime > settings.markets_cache_ttl:
+                return None
+            with path.open() as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_cached_markets(self, markets: Dict):
+        """Persist markets so restarts can skip load_markets()"""
+        path = self._markets_cache_path()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open('w') as f:
+                json.dump(markets, f)
+        except (OSError, TypeError, ValueError) as e:
+            log.warning(f"Could not cache markets for {self.exchange_name}: {e}")
+    
     async def close(self):
         """Close exchange connection"""
         if self.exchange:
             await self.exchange.close()
             log.info(f"Closed {self.exchange_name} connection")
+        
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+            self._owns_session = False
+    
+    async def _safe_call(
+        self,
+        op: str,
+        fn: Callable,
+        *args,
+        retry: bool = True,
+        **kwargs
+    ) -> Any:
+        """
+        Run an exchange call through the rate limiter and circuit breaker
+        
+        Args:
+            op: Operation description used in the error log
+            fn: ccxt coroutine function to call
+            retry: Retry transient failures; disable for non-idempotent calls
+                such as order creation
+        """
+        await self._rate_limiter.acquire()
+        
+        try:
+            if retry:
+                return await self._retry_policy.execute(self._circuit_breaker.call, fn, *args, **kwargs)
+            return await self._circuit_breaker.call(fn, *args, **kwargs)
+        except Exception as e:
+            log.error(f"Error {op}: {e.__class__.__name__}: {e}")
+            raise
     
     # Market Data Methods
     
     async def fetch_ticker(self, symbol: str) -> Dict:
         """Fetch current ticker data"""
-        try:
-            ticker = await self.exchange.fetch_ticker(symbol)
+        return await self._safe_call(f"fetching ticker for {symbol}", self.exchange.fetch_ticker, symbol)
+    
+    async def fetch_ticker_cached(self, symbol: str, ttl: float = 0.25) -> Dict:
+        """
+        Fetch ticker, reusing one fetched within the last ttl seconds
+        
+        Concurrent callers for the same symbol share a single request.
+        Pass ttl=0 to always fetch a fresh ticker.
+        """
+        if ttl <= 0:
+            return await self.fetch_ticker(symbol)
+        
+        cached = self._ticker_cache.get(symbol)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        
+        async with self._ticker_locks[symbol]:
+            # Another caller may have refreshed it while we waited
+            cached = self._ticker_cache.get(symbol)
+            if cached and time.monotonic() - cached[0] < ttl:
+                return cached[1]
+            
+            ticker = await self.fetch_ticker(symbol)
+            self._ticker_cache[symbol] = (time.monotonic(), ticker)
             return ticker
-        except Exception as e:
-            log.error(f"Error fetching ticker for {symbol}: {e}")
-            raise
     
     async def fetch_ohlcv(
         self,
@@ -72,52 +243,71 @@ class ExchangeManager:
         since: Optional[int] = None
     ) -> List[List]:
         """Fetch OHLCV (candlestick) data"""
-        try:
-            ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, since, limit)
-            return ohlcv
-        except Exception as e:
-            log.error(f"Error fetching OHLCV for {symbol}: {e}")
-            raise
+        return await self._safe_call(
+            f"fetching OHLCV for {symbol}",
+            self.exchange.fetch_ohlcv, symbol, timeframe, since, limit
+        )
+    
+    async def fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Fetch tickers for several symbols, in one request when supported"""
+        if self.exchange.has.get('fetchTickers'):
+            return await self._safe_call("fetching tickers", self.exchange.fetch_tickers, symbols)
+        
+        tickers = await asyncio.gather(*(self.fetch_ticker(symbol) for symbol in symbols))
+        return dict(zip(symbols, tickers))
+    
+    async def fetch_ohlcv_many(
+        self,
+        requests: List[Dict[str, Any]],
+        max_concurrency: int = 5
+    ) -> List[Any]:
+        """
+        Fetch OHLCV for several symbols concurrently
+        
+        Args:
+            requests: fetch_ohlcv keyword arguments, one dict per request
+            max_concurrency: Maximum requests in flight
+        
+        Returns:
+            Candles for each request in order; a failed request yields its
+            exception instead of raising
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch_one(request: Dict[str, Any]) -> List[List]:
+            async with semaphore:
+                return await self.fetch_ohlcv(**request)
+        
+        return await asyncio.gather(
+            *(fetch_one(request) for request in requests),
+            return_exceptions=True
+        )
     
     async def fetch_orderbook(self, symbol: str, limit: int = 20) -> Dict:
         """Fetch order book data"""
-        try:
-            orderbook = await self.exchange.fetch_order_book(symbol, limit)
-            return orderbook
-        except Exception as e:
-            log.error(f"Error fetching orderbook for {symbol}: {e}")
-            raise
+        return await self._safe_call(
+            f"fetching orderbook for {symbol}",
+            self.exchange.fetch_order_book, symbol, limit
+        )
     
     async def fetch_trades(self, symbol: str, limit: int = 50) -> List[Dict]:
         """Fetch recent trades"""
-        try:
-            trades = await self.exchange.fetch_trades(symbol, limit=limit)
-            return trades
-        except Exception as e:
-            log.error(f"Error fetching trades for {symbol}: {e}")
-            raise
+        return await self._safe_call(
+            f"fetching trades for {symbol}",
+            self.exchange.fetch_trades, symbol, limit=limit
+        )
     
     # Account Methods
     
     async def fetch_balance(self) -> Dict:
         """Fetch account balance"""
-        try:
-            balance = await self.exchange.fetch_balance()
-            return balance
-        except Exception as e:
-            log.error(f"Error fetching balance: {e}")
-            raise
+        return await self._safe_call("fetching balance", self.exchange.fetch_balance)
     
     async def fetch_positions(self, symbols: Optional[List[str]] = None) -> List[Dict]:
         """Fetch open positions (for futures)"""
-        try:
-            if hasattr(self.exchange, 'fetch_positions'):
-                positions = await self.exchange.fetch_positions(symbols)
-                return positions
+        if not hasattr(self.exchange, 'fetch_positions'):
             return []
-        except Exception as e:
-            log.error(f"Error fetching positions: {e}")
-            raise
+        return await self._safe_call("fetching positions", self.exchange.fetch_positions, symbols)
     
     # Order Methods - Spot Trading
     
@@ -129,19 +319,18 @@ class ExchangeManager:
         params: Optional[Dict] = None
     ) -> Dict:
         """Create a market order"""
-        try:
-            order = await self.exchange.create_order(
-                symbol=symbol,
-                type='market',
-                side=side,
-                amount=amount,
-                params=params or {}
-            )
-            log.info(f"Created market order: {side} {amount} {symbol}")
-            return order
-        except Exception as e:
-            log.error(f"Error creating market order: {e}")
-            raise
+        order = await self._safe_call(
+            "creating market order",
+            self.exchange.create_order,
+            symbol=symbol,
+            type='market',
+            side=side,
+            amount=amount,
+            params=params or {},
+            retry=False
+        )
+        log.info(f"Created market order: {side} {amount} {symbol}")
+        return order
     
     async def create_limit_order(
         self,
@@ -152,20 +341,19 @@ class ExchangeManager:
         params: Optional[Dict] = None
     ) -> Dict:
         """Create a limit order"""
-        try:
-            order = await self.exchange.create_order(
-                symbol=symbol,
-                type='limit',
-                side=side,
-                amount=amount,
-                price=price,
-                params=params or {}
-            )
-            log.info(f"Created limit order: {side} {amount} {symbol} @ {price}")
-            return order
-        except Exception as e:
-            log.error(f"Error creating limit order: {e}")
-            raise
+        order = await self._safe_call(
+            "creating limit order",
+            self.exchange.create_order,
+            symbol=symbol,
+            type='limit',
+            side=side,
+            amount=amount,
+            price=price,
+            params=params or {},
+            retry=False
+        )
+        log.info(f"Created limit order: {side} {amount} {symbol} @ {price}")
+        return order
     
     async def create_stop_loss_order(
         self,
@@ -176,22 +364,21 @@ class ExchangeManager:
         params: Optional[Dict] = None
     ) -> Dict:
         """Create a stop loss order"""
-        try:
-            params = params or {}
-            params['stopPrice'] = stop_price
-            
-            order = await self.exchange.create_order(
-                symbol=symbol,
-                type='stop_loss',
-                side=side,
-                amount=amount,
-                params=params
-            )
-            log.info(f"Created stop loss order: {side} {amount} {symbol} @ {stop_price}")
-            return order
-        except Exception as e:
-            log.error(f"Error creating stop loss order: {e}")
-            raise
+        params = params or {}
+        params['stopPrice'] = stop_price
+        
+        order = await self._safe_call(
+            "creating stop loss order",
+            self.exchange.create_order,
+            symbol=symbol,
+            type='stop_loss',
+            side=side,
+            amount=amount,
+            params=params,
+            retry=False
+        )
+        log.info(f"Created stop loss order: {side} {amount} {symbol} @ {stop_price}")
+        return order
     
     # Order Methods - Futures Trading
     
@@ -204,27 +391,29 @@ class ExchangeManager:
         reduce_only: bool = False
     ) -> Dict:
         """Create a futures market order"""
+        await self._ensure_leverage(symbol, leverage)
+        
+        params = {
+            'reduceOnly': reduce_only
+        }
+        
         try:
-            # Set leverage
-            if hasattr(self.exchange, 'set_leverage'):
-                await self.exchange.set_leverage(leverage, symbol)
-            
-            params = {
-                'reduceOnly': reduce_only
-            }
-            
-            order = await self.exchange.create_order(
+            order = await self._safe_call(
+                "creating futures market order",
+                self.exchange.create_order,
                 symbol=symbol,
                 type='market',
                 side=side,
                 amount=amount,
-                params=params
+                params=params,
+                retry=False
             )
-            log.info(f"Created futures market order: {side} {amount} {symbol} (leverage: {leverage}x)")
-            return order
-        except Exception as e:
-            log.error(f"Error creating futures market order: {e}")
+        except ccxt.ExchangeError:
+            # Leverage may have been changed or rejected exchange-side
+            self._leverage_cache.pop(symbol, None)
             raise
+        log.info(f"Created futures market order: {side} {amount} {symbol} (leverage: {leverage}x)")
+        return order
     
     async def create_futures_limit_order(
         self,
@@ -236,28 +425,44 @@ class ExchangeManager:
         reduce_only: bool = False
     ) -> Dict:
         """Create a futures limit order"""
+        await self._ensure_leverage(symbol, leverage)
+        
+        params = {
+            'reduceOnly': reduce_only
+        }
+        
         try:
-            # Set leverage
-            if hasattr(self.exchange, 'set_leverage'):
-                await self.exchange.set_leverage(leverage, symbol)
-            
-            params = {
-                'reduceOnly': reduce_only
-            }
-            
-            order = await self.exchange.create_order(
+            order = await self._safe_call(
+                "creating futures limit order",
+                self.exchange.create_order,
                 symbol=symbol,
                 type='limit',
                 side=side,
                 amount=amount,
                 price=price,
-                params=params
+                params=params,
+                retry=False
             )
-            log.info(f"Created futures limit order: {side} {amount} {symbol} @ {price} (leverage: {leverage}x)")
-            return order
-        except Exception as e:
-            log.error(f"Error creating futures limit order: {e}")
+        except ccxt.ExchangeError:
+            # Leverage may have been changed or rejected exchange-side
+            self._leverage_cache.pop(symbol, None)
+            raise
+        log.info(f"Created futures limit order: {side} {amount} {symbol} @ {price} (leverage: {leverage}x)")
+        return order
+    
+    async def _ensure_leverage(self, symbol: str, leverage: int):
+        """Set leverage for a symbol unless it is already at that value"""
+        if not hasattr(self.exchange, 'set_leverage'):
+            return
+        if self._leverage_cache.get(symbol) == leverage:
+            return
+        
+        try:
+            await self._safe_call("setting leverage", self.exchange.set_leverage, leverage, symbol)
+        except Exception:
+            self._leverage_cache.pop(symbol, None)
             raise
+        self._leverage_cache[symbol] = leverage
     
     async def set_margin_mode(self, symbol: str, margin_mode: str = 'isolated'):
         """Set margin mode (isolated or cross)"""
@@ -272,43 +477,31 @@ class ExchangeManager:
     
     async def cancel_order(self, order_id: str, symbol: str) -> Dict:
         """Cancel an order"""
-        try:
-            result = await self.exchange.cancel_order(order_id, symbol)
-            log.info(f"Cancelled order {order_id} for {symbol}")
-            return result
-        except Exception as e:
-            log.error(f"Error cancelling order {order_id}: {e}")
-            raise
+        result = await self._safe_call(
+            f"cancelling order {order_id}",
+            self.exchange.cancel_order, order_id, symbol
+        )
+        log.info(f"Cancelled order {order_id} for {symbol}")
+        return result
     
     async def cancel_all_orders(self, symbol: Optional[str] = None) -> List[Dict]:
         """Cancel all orders for a symbol"""
-        try:
-            if hasattr(self.exchange, 'cancel_all_orders'):
-                result = await self.exchange.cancel_all_orders(symbol)
-                log.info(f"Cancelled all orders for {symbol or 'all symbols'}")
-                return result
+        if not hasattr(self.exchange, 'cancel_all_orders'):
             return []
-        except Exception as e:
-            log.error(f"Error cancelling all orders: {e}")
-            raise
+        result = await self._safe_call("cancelling all orders", self.exchange.cancel_all_orders, symbol)
+        log.info(f"Cancelled all orders for {symbol or 'all symbols'}")
+        return result
     
     async def fetch_order(self, order_id: str, symbol: str) -> Dict:
         """Fetch order status"""
-        try:
-            order = await self.exchange.fetch_order(order_id, symbol)
-            return order
-        except Exception as e:
-            log.error(f"Error fetching order {order_id}: {e}")
-            raise
+        return await self._safe_call(
+            f"fetching order {order_id}",
+            self.exchange.fetch_order, order_id, symbol
+        )
     
     async def fetch_open_orders(self, symbol: Optional[str] = None) -> List[Dict]:
         """Fetch open orders"""
-        try:
-            orders = await self.exchange.fetch_open_orders(symbol)
-            return orders
-        except Exception as e:
-            log.error(f"Error fetching open orders: {e}")
-            raise
+        return await self._safe_call("fetching open orders", self.exchange.fetch_open_orders, symbol)
     
     async def fetch_closed_orders(
         self,
@@ -317,14 +510,12 @@ class ExchangeManager:
         limit: Optional[int] = None
     ) -> List[Dict]:
         """Fetch closed orders"""
-        try:
-            if hasattr(self.exchange, 'fetch_closed_orders'):
-                orders = await self.exchange.fetch_closed_orders(symbol, since, limit)
-                return orders
+        if not hasattr(self.exchange, 'fetch_closed_orders'):
             return []
-        except Exception as e:
-            log.error(f"Error fetching closed orders: {e}")
-            raise
+        return await self._safe_call(
+            "fetching closed orders",
+            self.exchange.fetch_closed_orders, symbol, since, limit
+        )
     
     # Utility Methods
     
@@ -332,19 +523,23 @@ class ExchangeManager:
         """Get market information"""
         return self.markets.get(symbol)
     
-    def calculate_fee(self, amount: float, price: float, side: str) -> float:
-        """Calculate trading fee"""
-        if symbol_info := self.get_market_info(symbol):
-            fee_rate = symbol_info.get('taker' if side == 'market' else 'maker', 0.001)
-            return amount * price * fee_rate
-        return amount * price * 0.001  # Default 0.1%
+    def calculate_fee(self, symbol: str, amount: float, price: float, side: str) -> float:
+        """
+        Calculate trading fee
+        
+        Args:
+            side: Order type; 'market' orders pay the taker rate, others maker
+        """
+        taker, maker = self._fee_table.get(symbol, (0.001, 0.001))  # Default 0.1%
+        return amount * price * (taker if side == 'market' else maker)
+    
+    def get_trading_limits(self, symbol: str) -> tuple:
+        """Get (min_amount, min_price, price_precision) for a symbol"""
+        return self._trading_limits.get(symbol, (None, None, None))
     
     def is_futures_market(self, symbol: str) -> bool:
         """Check if symbol is a futures market"""
-        market_info = self.get_market_info(symbol)
-        if market_info:
-            return market_info.get('type') == 'future' or market_info.get('future', False)
-        return False
+        return symbol in self._futures_symbols
     
     async def __aenter__(self):
         """Async context manager entry"""
@@ -360,6 +555,14 @@ class ExchangeFactory:
     """Factory for creating exchange managers"""
     
     _instances: Dict[str, ExchangeManager] = {}
+    _session: Optional[aiohttp.ClientSession] = None
+    
+    @classmethod
+    def _get_session(cls) -> aiohttp.ClientSession:
+        """Shared HTTP session so connections and DNS lookups are pooled"""
+        if cls._session is None or cls._session.closed:
+            cls._session = _create_session()
+        return cls._session
     
     @classmethod
     async def get_exchange(cls, exchange_name: str) -> ExchangeManager:
@@ -378,7 +581,12 @@ class ExchangeFactory:
                 api_key = settings.bybit_api_key
                 api_secret = settings.bybit_api_secret
             
-            manager = ExchangeManager(exchange_name, api_key, api_secret)
+            manager = ExchangeManager(
+                exchange_name,
+                api_key,
+                api_secret,
+                session=cls._get_session()
+            )
             await manager.initialize()
             cls._instances[key] = manager
         
@@ -390,4 +598,8 @@ class ExchangeFactory:
         for manager in cls._instances.values():
             await manager.close()
         cls._instances.clear()
+        
+        if cls._session is not None:
+            await cls._session.close()
+            cls._session = None
 
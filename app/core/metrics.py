@@ -0,0 +1,110 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition
+"""
+from typing import Dict, List, Optional, Tuple
+
+# Label value shared by every label set past a metric's max_children
+OVERFLOW_LABEL = "other"
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Value:
+    """Single metric sample; callers keep a reference to update it cheaply"""
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _Metric:
+    """Base metric with optional labels"""
+    metric_type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        max_children: Optional[int] = None
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_children = max_children
+        self._children: Dict[Tuple[str, ...], _Value] = {}
+        REGISTRY.append(self)
+
+    def labels(self, *values: str) -> _Value:
+        """
+        Get the sample for a label combination (created on first use)
+
+        Once max_children label sets exist, new ones all share the
+        OVERFLOW_LABEL sample so the number of series stays bounded.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            if self.max_children is not None and len(self._children) >= self.max_children:
+                values = (OVERFLOW_LABEL,) * len(values)
+                child = self._children.get(values)
+                if child is not None:
+                    return child
+            child = self._children[values] = _Value()
+        return child
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}"
+        ]
+        for values, child in self._children.items():
+            if values:
+                label_str = ",".join(
+                    f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)
+                )
+                lines.append(f"{self.name}{{{label_str}}} {child.value}")
+            else:
+                lines.append(f"{self.name} {child.value}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+    metric_type = "counter"
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    metric_type = "gauge"
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render_metrics() -> str:
+    """Render all registered metrics in Prometheus text format"""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Error recovery metrics
+circuit_state = Gauge('cb_state', 'Circuit breaker state (0=closed, 1=open, 2=half_open)', ('name',))
+circuit_failures = Counter('cb_failures_total', 'Failures seen by circuit breaker', ('name',))
+circuit_transitions = Counter('cb_transitions_total', 'Circuit breaker state transitions', ('name', 'state'))
+errors_total = Counter('errors_total', 'Errors recorded by ErrorTracker', ('type',), max_children=256)
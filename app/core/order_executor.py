@@ -1,8 +1,13 @@
 """
 Order execution with paper trading and live trading modes
 """
+import asyncio
+import functools
+import itertools
+import time
 from typing import Optional, Dict
 from datetime import datetime
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exchange_manager import ExchangeManager
@@ -15,10 +20,26 @@ from app.config import get_settings
 
 settings = get_settings()
 
+# Paper order ids: shared by all executors so ids stay unique within the process
+_paper_order_ids = itertools.count(time.time_ns() // 1000)
+
+
+# Core INSERT for paper buys, built once so its compiled form is reused
+_TRADE_INSERT = insert(Trade).returning(Trade.id)
+
+
+@functools.lru_cache(maxsize=1024)
+def _quote_of(symbol: str) -> str:
+    """Quote currency of a 'BASE/QUOTE' symbol"""
+    return symbol.split('/')[1]
+
 
 class OrderExecutor:
     """Handles order execution in paper or live trading mode"""
     
+    # position id -> in-flight close; shared because the bot builds executors per cycle
+    _closing: Dict[int, asyncio.Task] = {}
+    
     def __init__(
         self,
         exchange: ExchangeManager,
@@ -30,6 +51,10 @@ class OrderExecutor:
         self.db = db
         self.event_bus = get_event_bus()
         self.paper_trading = settings.paper_trading
+        self.paper_fee_rate = 0.001  # 0.1% simulated taker fee
+        
+        # Orders may run concurrently; their DB transactions on the shared session may not
+        self._db_lock = asyncio.Lock()
         
         log.info(f"OrderExecutor initialized in {'PAPER' if self.paper_trading else 'LIVE'} trading mode")
     
@@ -52,7 +77,7 @@ class OrderExecutor:
                     symbol, amount, strategy_name, stop_loss, take_profit
                 )
         except Exception as e:
-            log.error(f"Error executing market buy: {e}")
+            log.error("Error executing market buy: {}", e)
             await self.event_bus.emit(
                 EventType.ORDER_FAILED,
                 {'symbol': symbol, 'side': 'buy', 'error': str(e)}
@@ -72,7 +97,7 @@ class OrderExecutor:
             else:
                 return await self._live_market_sell(symbol, amount, strategy_name)
         except Exception as e:
-            log.error(f"Error executing market sell: {e}")
+            log.error("Error executing market sell: {}", e)
             await self.event_bus.emit(
                 EventType.ORDER_FAILED,
                 {'symbol': symbol, 'side': 'sell', 'error': str(e)}
@@ -88,8 +113,8 @@ class OrderExecutor:
         take_profit: Optional[float]
     ) -> Trade:
         """Execute paper trading buy order"""
-        # Get current market price
-        ticker = await self.exchange.fetch_ticker(symbol)
+        # Get current market price (paper fills tolerate a slightly stale ticker)
+        ticker = await self.exchange.fetch_ticker_cached(symbol)
         price = ticker.get('last') or ticker.get('close')
         
         if not price:
@@ -97,45 +122,57 @@ class OrderExecutor:
         
         # Calculate cost
         cost = amount * price
-        fee = cost * 0.001  # 0.1% fee
+        fee = cost * self.paper_fee_rate
         
         # Create trade record
-        trade = Trade(
+        now = datetime.utcnow()
+        values = dict(
             exchange=self.exchange.exchange_name,
             symbol=symbol,
-            order_id=f"paper_{datetime.utcnow().timestamp()}",
+            order_id=f"paper_{next(_paper_order_ids)}",
             side='buy',
             order_type='market',
             amount=amount,
             price=price,
             cost=cost,
             fee=fee,
-            fee_currency=symbol.split('/')[1],
+            fee_currency=_quote_of(symbol),
             position_side='long',
             strategy_name=strategy_name,
             status='open',
             is_paper_trade=True,
-            executed_at=datetime.utcnow()
+            executed_at=now
         )
         
-        self.db.add(trade)
-        await self.db.commit()
-        await self.db.refresh(trade)
-        
-        # Open position
-        await self.portfolio.open_position(
-            exchange=self.exchange.exchange_name,
-            symbol=symbol,
-            side='long',
-            amount=amount,
-            entry_price=price,
-            strategy_name=strategy_name,
-            stop_loss=stop_loss,
-            take_profit=take_profit,
-            trade_id=trade.id
-        )
+        # Trade and position are written in one transaction
+        async with self._db_lock:
+            try:
+                # Core insert skips the unit of work; callers only read the
+                # returned Trade, so an unattached copy is enough
+                result = await self.db.execute(_TRADE_INSERT, values)
+                trade = Trade(id=result.scalar_one(), **values)
+                
+                # Open position
+                await self.portfolio.open_position(
+                    exchange=self.exchange.exchange_name,
+                    symbol=symbol,
+                    side='long',
+                    amount=amount,
+                    entry_price=price,
+                    strategy_name=strategy_name,
+                    stop_loss=stop_loss,
+                    take_profit=take_profit,
+                    trade_id=trade.id,
+                    autocommit=False
+                )
+                await self.db.commit()
+                self.portfolio.apply_committed()
+            except Exception:
+                await self.db.rollback()
+                await self.portfolio.discard_uncommitted()
+                raise
         
-        log.info(f"PAPER: Bought {amount} {symbol} @ ${price:.2f} | Cost: ${cost:.2f}")
+        log.info("PAPER: Bought {} {} @ ${:.2f} | Cost: ${:.2f}", amount, symbol, price, cost)
         
         await self.event_bus.emit(
             EventType.ORDER_FILLED,
@@ -151,8 +188,8 @@ class OrderExecutor:
         strategy_name: str
     ) -> Trade:
         """Execute paper trading sell order"""
-        # Get current market price
-        ticker = await self.exchange.fetch_ticker(symbol)
+        # Get current market price (paper fills tolerate a slightly stale ticker)
+        ticker = await self.exchange.fetch_ticker_cached(symbol)
         price = ticker.get('last') or ticker.get('close')
         
         if not price:
@@ -160,42 +197,55 @@ class OrderExecutor:
         
         # Calculate proceeds
         cost = amount * price
-        fee = cost * 0.001  # 0.1% fee
+        fee = cost * self.paper_fee_rate
         
         # Create trade record
+        now = datetime.utcnow()
         trade = Trade(
             exchange=self.exchange.exchange_name,
             symbol=symbol,
-            order_id=f"paper_{datetime.utcnow().timestamp()}",
+            order_id=f"paper_{next(_paper_order_ids)}",
             side='sell',
             order_type='market',
             amount=amount,
             price=price,
             cost=cost,
             fee=fee,
-            fee_currency=symbol.split('/')[1],
+            fee_currency=_quote_of(symbol),
             position_side='short',
             strategy_name=strategy_name,
             status='closed',
             is_paper_trade=True,
-            executed_at=datetime.utcnow(),
-            closed_at=datetime.utcnow()
+            executed_at=now,
+            closed_at=now
         )
         
-        self.db.add(trade)
-        await self.db.commit()
-        await self.db.refresh(trade)
-        
-        # Check if closing a position
-        position = await self.portfolio.get_position(self.exchange.exchange_name, symbol)
-        if position:
-            realized_pnl = await self.portfolio.close_position(position, price, trade.id)
-            trade.realized_pnl = realized_pnl
-            await self.db.commit()
-            
-            log.info(f"PAPER: Sold {amount} {symbol} @ ${price:.2f} | P&L: ${realized_pnl:.2f}")
+        # Trade and position close are written in one transaction
+        async with self._db_lock:
+            self.db.add(trade)
+            try:
+                await self.db.flush()  # assigns trade.id
+                
+                # Check if closing a position
+                position = await self.portfolio.get_position(self.exchange.exchange_name, symbol)
+                realized_pnl = None
+                if position:
+                    realized_pnl = await self.portfolio.close_position(
+                        position, price, trade.id, autocommit=False
+                    )
+                    trade.realized_pnl = realized_pnl
+                await self.db.commit()
+                self.portfolio.apply_committed()
+                self.portfolio.invalidate_stats()  # new closed trade
+            except Exception:
+                await self.db.rollback()
+                await self.portfolio.discard_uncommitted()
+                raise
+        
+        if realized_pnl is not None:
+            log.info("PAPER: Sold {} {} @ ${:.2f} | P&L: ${:.2f}", amount, symbol, price, realized_pnl)
         else:
-            log.info(f"PAPER: Sold {amount} {symbol} @ ${price:.2f}")
+            log.info("PAPER: Sold {} {} @ ${:.2f}", amount, symbol, price)
         
         await self.event_bus.emit(
             EventType.ORDER_FILLED,
@@ -213,7 +263,7 @@ class OrderExecutor:
         take_profit: Optional[float]
     ) -> Trade:
         """Execute live market buy order"""
-        log.warning(f"LIVE TRADING: Executing real market buy for {amount} {symbol}")
+        log.warning("LIVE TRADING: Executing real market buy for {} {}", amount, symbol)
         
         # Execute order on exchange
         order = await self.exchange.create_market_order(symbol, 'buy', amount)
@@ -225,6 +275,7 @@ class OrderExecutor:
         fee = order.get('fee', {}).get('cost', 0)
         
         # Create trade record
+        now = datetime.utcnow()
         trade = Trade(
             exchange=self.exchange.exchange_name,
             symbol=symbol,
@@ -235,40 +286,54 @@ class OrderExecutor:
             price=price,
             cost=cost,
             fee=fee,
-            fee_currency=order.get('fee', {}).get('currency', symbol.split('/')[1]),
+            fee_currency=order.get('fee', {}).get('currency') or _quote_of(symbol),
             position_side='long',
             strategy_name=strategy_name,
             status='open',
             is_paper_trade=False,
-            executed_at=datetime.utcnow()
+            executed_at=now
         )
         
-        self.db.add(trade)
-        await self.db.commit()
-        await self.db.refresh(trade)
-        
-        # Open position
-        await self.portfolio.open_position(
-            exchange=self.exchange.exchange_name,
-            symbol=symbol,
-            side='long',
-            amount=filled_amount,
-            entry_price=price,
-            strategy_name=strategy_name,
-            stop_loss=stop_loss,
-            take_profit=take_profit,
-            trade_id=trade.id
-        )
-        
-        # Place stop loss and take profit orders if specified
+        # Place stop loss if specified; it doesn't depend on the DB write,
+        # so it runs concurrently with recording the trade
+        stop_loss_task = None
         if stop_loss:
-            try:
-                await self.exchange.create_stop_loss_order(symbol, 'sell', filled_amount, stop_loss)
-                log.info(f"Placed stop loss at ${stop_loss:.2f}")
-            except Exception as e:
-                log.warning(f"Could not place stop loss: {e}")
+            stop_loss_task = asyncio.create_task(
+                self._place_stop_loss(symbol, filled_amount, stop_loss)
+            )
         
-        log.info(f"LIVE: Bought {filled_amount} {symbol} @ ${price:.2f} | Cost: ${cost:.2f}")
+        # Trade and position are written in one transaction
+        try:
+            async with self._db_lock:
+                self.db.add(trade)
+                try:
+                    await self.db.flush()  # assigns trade.id
+                    
+                    # Open position
+                    await self.portfolio.open_position(
+                        exchange=self.exchange.exchange_name,
+                        symbol=symbol,
+                        side='long',
+                        amount=filled_amount,
+                        entry_price=price,
+                        strategy_name=strategy_name,
+                        stop_loss=stop_loss,
+                        take_profit=take_profit,
+                        trade_id=trade.id,
+                        autocommit=False
+                    )
+                    await self.db.commit()
+                    self.portfolio.apply_committed()
+                except Exception:
+                    await self.db.rollback()
+                    await self.portfolio.discard_uncommitted()
+                    raise
+        finally:
+            # The order is filled either way, so never abandon its stop loss
+            if stop_loss_task:
+                await stop_loss_task
+        
+        log.info("LIVE: Bought {} {} @ ${:.2f} | Cost: ${:.2f}", filled_amount, symbol, price, cost)
         
         await self.event_bus.emit(
             EventType.ORDER_FILLED,
@@ -277,6 +342,14 @@ class OrderExecutor:
         
         return trade
     
+    async def _place_stop_loss(self, symbol: str, amount: float, stop_price: float):
+        """Place a protective stop loss, logging instead of raising on failure"""
+        try:
+            await self.exchange.create_stop_loss_order(symbol, 'sell', amount, stop_price)
+            log.info("Placed stop loss at ${:.2f}", stop_price)
+        except Exception as e:
+            log.warning("Could not place stop loss: {}", e)
+    
     async def _live_market_sell(
         self,
         symbol: str,
@@ -284,7 +357,7 @@ class OrderExecutor:
         strategy_name: str
     ) -> Trade:
         """Execute live market sell order"""
-        log.warning(f"LIVE TRADING: Executing real market sell for {amount} {symbol}")
+        log.warning("LIVE TRADING: Executing real market sell for {} {}", amount, symbol)
         
         # Execute order on exchange
         order = await self.exchange.create_market_order(symbol, 'sell', amount)
@@ -296,6 +369,7 @@ class OrderExecutor:
         fee = order.get('fee', {}).get('cost', 0)
         
         # Create trade record
+        now = datetime.utcnow()
         trade = Trade(
             exchange=self.exchange.exchange_name,
             symbol=symbol,
@@ -306,29 +380,41 @@ class OrderExecutor:
             price=price,
             cost=cost,
             fee=fee,
-            fee_currency=order.get('fee', {}).get('currency', symbol.split('/')[1]),
+            fee_currency=order.get('fee', {}).get('currency') or _quote_of(symbol),
             position_side='short',
             strategy_name=strategy_name,
             status='closed',
             is_paper_trade=False,
-            executed_at=datetime.utcnow(),
-            closed_at=datetime.utcnow()
+            executed_at=now,
+            closed_at=now
         )
         
-        self.db.add(trade)
-        await self.db.commit()
-        await self.db.refresh(trade)
-        
-        # Check if closing a position
-        position = await self.portfolio.get_position(self.exchange.exchange_name, symbol)
-        if position:
-            realized_pnl = await self.portfolio.close_position(position, price, trade.id)
-            trade.realized_pnl = realized_pnl
-            await self.db.commit()
-            
-            log.info(f"LIVE: Sold {filled_amount} {symbol} @ ${price:.2f} | P&L: ${realized_pnl:.2f}")
+        # Trade and position close are written in one transaction
+        async with self._db_lock:
+            self.db.add(trade)
+            try:
+                await self.db.flush()  # assigns trade.id
+                
+                # Check if closing a position
+                position = await self.portfolio.get_position(self.exchange.exchange_name, symbol)
+                realized_pnl = None
+                if position:
+                    realized_pnl = await self.portfolio.close_position(
+                        position, price, trade.id, autocommit=False
+                    )
+                    trade.realized_pnl = realized_pnl
+                await self.db.commit()
+                self.portfolio.apply_committed()
+                self.portfolio.invalidate_stats()  # new closed trade
+            except Exception:
+                await self.db.rollback()
+                await self.portfolio.discard_uncommitted()
+                raise
+        
+        if realized_pnl is not None:
+            log.info("LIVE: Sold {} {} @ ${:.2f} | P&L: ${:.2f}", filled_amount, symbol, price, realized_pnl)
         else:
-            log.info(f"LIVE: Sold {filled_amount} {symbol} @ ${price:.2f}")
+            log.info("LIVE: Sold {} {} @ ${:.2f}", filled_amount, symbol, price)
         
         await self.event_bus.emit(
             EventType.ORDER_FILLED,
@@ -342,7 +428,23 @@ class OrderExecutor:
         position: Position,
         reason: str = "manual"
     ) -> Optional[Trade]:
-        """Close an open position"""
+        """
+        Close an open position
+        
+        Concurrent closes of the same position (e.g. stop loss and take profit
+        tripping in one tick) share a single sell order and its result.
+        """
+        task = self._closing.get(position.id)
+        if task is None:
+            task = asyncio.create_task(self._close_position(position, reason))
+            self._closing[position.id] = task
+            task.add_done_callback(lambda _: self._closing.pop(position.id, None))
+        
+        # Shielded so a cancelled caller doesn't abort a close others wait on
+        return await asyncio.shield(task)
+    
+    async def _close_position(self, position: Position, reason: str) -> Optional[Trade]:
+        """Sell out of a position and announce it"""
         try:
             log.info(f"Closing position: {position.symbol} ({reason})")
             
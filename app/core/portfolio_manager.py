@@ -1,10 +1,12 @@
 """
 Portfolio and position management
 """
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.models.position import Position
 from app.models.trade import Trade
@@ -26,9 +28,34 @@ class PortfolioManager:
             max_daily_loss=settings.max_daily_loss,
             max_open_positions=settings.max_open_positions
         )
-        self.positions: Dict[str, Position] = {}
+        self.positions: Dict[Tuple[str, str], Position] = {}  # (exchange, symbol) -> position
+        self._positions_snapshot: Tuple[Position, ...] = ()  # rebuilt whenever positions change
+        
+        # Column arrays mirroring self.positions for vectorized price updates,
+        # rebuilt lazily whenever positions are added or removed
+        self._pos_list: Tuple[Position, ...] = ()
+        self._pos_symbols: List[str] = []
+        self._pos_entry = np.empty(0)
+        self._pos_amount = np.empty(0)
+        self._pos_side_sign = np.empty(0)  # +1 long, -1 short
+        self._pos_stop = np.empty(0)  # NaN when unset
+        self._pos_tp = np.empty(0)  # NaN when unset
+        self._pos_current = np.empty(0)  # last price written to each position
+        self._pos_dirty = True
+        
+        # Price updates not yet written, by position id (see _flush_prices)
+        self._pending_prices: Dict[int, Dict] = {}
+        # In-memory bookkeeping for writes left to the caller's transaction,
+        # run by apply_committed once that transaction commits
+        self._after_commit: List[Callable[[], None]] = []
         self.initial_balance = 0.0
         self.current_balance = 0.0
+        
+        # Cached parts of get_portfolio_stats, recomputed only when dirty
+        self._realized_stats: Optional[Tuple[float, int]] = None  # (realized P&L, closed trades)
+        self._unrealized_pnl = 0.0
+        self._realized_dirty = True
+        self._unrealized_dirty = True
     
     async def initialize(self, initial_balance: float):
         """Initialize portfolio with starting balance"""
@@ -49,8 +76,9 @@ class PortfolioManager:
             positions = result.scalars().all()
             
             for position in positions:
-                key = f"{position.exchange}:{position.symbol}"
-                self.positions[key] = position
+                self.positions[(position.exchange, position.symbol)] = position
+            self._positions_changed()
+            self._unrealized_dirty = True
             
             log.info(f"Loaded {len(self.positions)} open positions")
         except Exception as e:
@@ -67,9 +95,16 @@ class PortfolioManager:
         leverage: float = 1.0,
         stop_loss: Optional[float] = None,
         take_profit: Optional[float] = None,
-        trade_id: Optional[int] = None
+        trade_id: Optional[int] = None,
+        autocommit: bool = True
     ) -> Position:
-        """Open a new position"""
+        """
+        Open a new position
+        
+        With autocommit=False the position is only flushed, leaving the
+        commit (or rollback) to the caller's transaction; it is tracked in
+        memory only once the caller runs apply_committed.
+        """
         try:
             position = Position(
                 exchange=exchange,
@@ -92,13 +127,18 @@ class PortfolioManager:
             position.update_pnl(entry_price)
             
             # Add to database
+            # Flushing assigns position.id; all defaults are set client-side,
+            # so there is nothing to refresh after committing
             self.db.add(position)
-            await self.db.commit()
-            await self.db.refresh(position)
+            await self.db.flush()
+            
+            def track():
+                # Add to local positions
+                self.positions[(exchange, symbol)] = position
+                self._positions_changed()
+                self._unrealized_dirty = True
             
-            # Add to local positions
-            key = f"{exchange}:{symbol}"
-            self.positions[key] = position
+            await self._commit_or_defer(autocommit, track)
             
             log.info(f"Opened position: {side} {amount} {symbol} @ {entry_price}")
             
@@ -106,17 +146,31 @@ class PortfolioManager:
             
         except Exception as e:
             log.error(f"Error opening position: {e}")
-            await self.db.rollback()
+            if autocommit:
+                await self.db.rollback()
+                await self.discard_uncommitted()
             raise
     
     async def close_position(
         self,
         position: Position,
         exit_price: float,
-        trade_id: Optional[int] = None
+        trade_id: Optional[int] = None,
+        autocommit: bool = True
     ) -> float:
-        """Close an existing position and return realized P&L"""
+        """
+        Close an existing position and return realized P&L
+        
+        With autocommit=False the change is left to the caller's transaction,
+        and the position, balance and daily P&L are updated in memory only
+        once the caller runs apply_committed.
+        """
         try:
+            # Queued prices are already marked committed on the objects, so
+            # write them first; otherwise an exit at the last applied price
+            # looks unchanged to the ORM and is never saved
+            await self._flush_prices()
+            
             # Calculate final P&L
             position.update_pnl(exit_price)
             realized_pnl = position.unrealized_pnl
@@ -126,18 +180,22 @@ class PortfolioManager:
             position.closed_at = datetime.utcnow()
             position.exit_trade_id = trade_id
             
-            await self.db.commit()
-            
-            # Remove from local positions
-            key = f"{position.exchange}:{position.symbol}"
-            if key in self.positions:
-                del self.positions[key]
-            
-            # Update balance
-            self.current_balance += realized_pnl
+            def untrack():
+                # Remove from local positions
+                key = (position.exchange, position.symbol)
+                if self.positions.get(key) is position:
+                    del self.positions[key]
+                    self._positions_changed()
+                self._realized_dirty = True
+                self._unrealized_dirty = True
+                
+                # Update balance
+                self.current_balance += realized_pnl
+                
+                # Update risk manager
+                self.risk_manager.update_daily_pnl(realized_pnl)
             
-            # Update risk manager
-            self.risk_manager.update_daily_pnl(realized_pnl)
+            await self._commit_or_defer(autocommit, untrack)
             
             log.info(f"Closed position: {position.symbol} | P&L: ${realized_pnl:.2f}")
             
@@ -145,41 +203,164 @@ class PortfolioManager:
             
         except Exception as e:
             log.error(f"Error closing position: {e}")
-            await self.db.rollback()
+            if autocommit:
+                await self.db.rollback()
+                await self.discard_uncommitted()
             raise
     
+    async def _commit_or_defer(self, autocommit: bool, apply: Callable[[], None]):
+        """Commit and apply now, or leave both to the caller's transaction"""
+        if autocommit:
+            await self.db.commit()
+            apply()
+        else:
+            self._after_commit.append(apply)
+    
+    def apply_committed(self):
+        """Apply in-memory changes of writes the caller has just committed"""
+        callbacks, self._after_commit = self._after_commit, []
+        for apply in callbacks:
+            apply()
+    
+    async def discard_uncommitted(self):
+        """
+        Resync with the database after the caller's transaction rolled back
+        
+        Drops the deferred changes and reloads open positions; the rollback
+        expired every loaded position and undid any queued price writes.
+        """
+        self._after_commit = []
+        self._pending_prices = {}
+        self.positions = {}
+        await self.load_open_positions()
+    
     async def update_position_prices(self, prices: Dict[str, float]):
-        """Update current prices for all positions"""
-        for key, position in self.positions.items():
-            symbol = position.symbol
-            if symbol in prices:
-                position.update_pnl(prices[symbol])
-                
-                # Check if position should be closed (stop loss/take profit)
-                should_close, reason = position.should_close()
-                if should_close:
-                    log.warning(f"Position {symbol} triggered {reason}")
-                    # Note: Actual closing should be handled by order executor
+        """
+        Update current prices for all positions
+        
+        Changed prices are written with one bulk UPDATE and committed; when
+        no price changed, nothing is written.
+        """
+        triggered = self._apply_prices(prices)
+        for position, reason in triggered:
+            log.warning(f"Position {position.symbol} triggered {reason}")
+            # Note: Actual closing should be handled by order executor
+        
+        if not self._pending_prices:
+            return
         
+        await self._flush_prices()
         await self.db.commit()
     
+    async def _flush_prices(self):
+        """Write pending price updates with one executemany UPDATE"""
+        if not self._pending_prices:
+            return
+        
+        rows = list(self._pending_prices.values())
+        self._pending_prices = {}
+        await self.db.execute(update(Position), rows)
+    
     async def get_position(self, exchange: str, symbol: str) -> Optional[Position]:
         """Get position by exchange and symbol"""
-        key = f"{exchange}:{symbol}"
-        return self.positions.get(key)
+        return self.positions.get((exchange, symbol))
     
-    async def get_all_positions(self) -> List[Position]:
-        """Get all open positions"""
-        return list(self.positions.values())
+    def _build_position_arrays(self):
+        """Snapshot open positions into column arrays"""
+        positions = self._positions_snapshot
+        self._pos_list = positions
+        self._pos_symbols = [p.symbol for p in positions]
+        self._pos_entry = np.array([p.entry_price for p in positions], dtype=np.float64)
+        self._pos_amount = np.array([p.amount for p in positions], dtype=np.float64)
+        self._pos_side_sign = np.array(
+            [1.0 if p.side == "long" else -1.0 for p in positions], dtype=np.float64
+        )
+        self._pos_stop = np.array([p.stop_loss or np.nan for p in positions], dtype=np.float64)
+        self._pos_tp = np.array([p.take_profit or np.nan for p in positions], dtype=np.float64)
+        self._pos_current = np.array(
+            [np.nan if p.current_price is None else p.current_price for p in positions],
+            dtype=np.float64
+        )
+        self._pos_dirty = False
+    
+    def _apply_prices(self, prices: Dict[str, float]) -> List[Tuple[Position, str]]:
+        """
+        Reprice positions quoted in prices, same math as Position.update_pnl
+        
+        Only positions whose price changed are written back. Returns
+        (position, reason) for every quoted position past its stop loss or
+        take profit.
+        """
+        if self._pos_dirty:
+            self._build_position_arrays()
+        if not self._pos_list:
+            return []
+        
+        self._unrealized_dirty = True
+        
+        current = np.fromiter(
+            (prices.get(symbol, np.nan) for symbol in self._pos_symbols),
+            dtype=np.float64,
+            count=len(self._pos_symbols)
+        )
+        quoted = ~np.isnan(current)
+        priced = quoted & (current != 0)
+        
+        position_value = self._pos_amount * self._pos_entry
+        pnl = np.where(
+            priced, (self._pos_amount * current - position_value) * self._pos_side_sign, 0.0
+        )
+        pnl_pct = np.zeros_like(pnl)
+        np.divide(pnl, position_value, out=pnl_pct, where=position_value > 0)
+        pnl_pct *= 100
+        
+        # Write back only what changed; NaN in _pos_current never compares equal
+        changed = np.flatnonzero(quoted & (current != self._pos_current))
+        if changed.size:
+            now = datetime.utcnow()
+            for i in changed:
+                position = self._pos_list[i]
+                row = {
+                    'current_price': float(current[i]),
+                    'unrealized_pnl': float(pnl[i]),
+                    'unrealized_pnl_percentage': float(pnl_pct[i]),
+                    'updated_at': now
+                }
+                # Set without marking the object dirty; the row is written in
+                # bulk by _flush_prices instead of one UPDATE per position
+                for key, value in row.items():
+                    set_committed_value(position, key, value)
+                row['id'] = position.id
+                self._pending_prices[position.id] = row
+            self._pos_current[changed] = current[changed]
+        
+        # Multiplying by the side sign flips the comparisons for shorts
+        signed = current * self._pos_side_sign
+        stop_hit = priced & (signed <= self._pos_stop * self._pos_side_sign)
+        tp_hit = priced & (signed >= self._pos_tp * self._pos_side_sign)
+        
+        return [
+            (self._pos_list[i], "stop_loss" if stop_hit[i] else "take_profit")
+            for i in np.flatnonzero(stop_hit | tp_hit)
+        ]
+    
+    def _positions_changed(self):
+        """Refresh derived views after positions are added or removed"""
+        self._positions_snapshot = tuple(self.positions.values())
+        self._pos_dirty = True
+    
+    async def get_all_positions(self) -> Tuple[Position, ...]:
+        """Get all open positions (a shared, read-only snapshot)"""
+        return self._positions_snapshot
     
     async def get_portfolio_value(self, current_prices: Optional[Dict[str, float]] = None) -> float:
         """Calculate total portfolio value including unrealized P&L"""
         total_value = self.current_balance
         
         if current_prices:
+            self._apply_prices(current_prices)
             for position in self.positions.values():
                 if position.symbol in current_prices:
-                    position.update_pnl(current_prices[position.symbol])
                     total_value += position.unrealized_pnl
         
         return total_value
@@ -187,14 +368,22 @@ class PortfolioManager:
     async def get_portfolio_stats(self) -> Dict:
         """Get portfolio statistics"""
         # Calculate total unrealized P&L
-        total_unrealized_pnl = sum(p.unrealized_pnl for p in self.positions.values())
+        if self._unrealized_dirty:
+            self._unrealized_pnl = sum(p.unrealized_pnl for p in self.positions.values())
+            self._unrealized_dirty = False
+        total_unrealized_pnl = self._unrealized_pnl
         
         # Calculate total realized P&L
-        result = await self.db.execute(
-            select(Trade).where(Trade.status == "closed")
-        )
-        trades = result.scalars().all()
-        total_realized_pnl = sum(t.realized_pnl for t in trades)
+        if self._realized_dirty or self._realized_stats is None:
+            result = await self.db.execute(
+                select(
+                    func.coalesce(func.sum(Trade.realized_pnl), 0.0),
+                    func.count(Trade.id)
+                ).where(Trade.status == "closed")
+            )
+            self._realized_stats = tuple(result.one())
+            self._realized_dirty = False
+        total_realized_pnl, closed_trades = self._realized_stats
         
         # Calculate returns
         total_pnl = total_realized_pnl + total_unrealized_pnl
@@ -208,9 +397,14 @@ class PortfolioManager:
             "total_pnl": total_pnl,
             "total_return_pct": total_return,
             "open_positions": len(self.positions),
-            "total_trades": len(trades)
+            "total_trades": closed_trades
         }
     
+    def invalidate_stats(self):
+        """Force get_portfolio_stats to recompute (e.g. after recording a trade)"""
+        self._realized_dirty = True
+        self._unrealized_dirty = True
+    
     def can_open_position(self, position_value: float) -> tuple[bool, Optional[str]]:
         """Check if a new position can be opened based on risk management"""
         current_positions = len(self.positions)
@@ -233,13 +427,12 @@ class PortfolioManager:
         today = datetime.utcnow().date()
         
         result = await self.db.execute(
-            select(Trade).where(
+            select(func.coalesce(func.sum(Trade.realized_pnl), 0.0)).where(
                 Trade.closed_at >= datetime.combine(today, datetime.min.time())
             )
         )
-        trades = result.scalars().all()
         
-        return sum(t.realized_pnl for t in trades)
+        return result.scalar_one()
     
     def reset_daily_limits(self):
         """Reset daily risk limits (call at start of each day)"""
@@ -2,15 +2,19 @@
 Trading Bot Orchestrator - Main autonomous trading system
 """
 import asyncio
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Set
 from datetime import datetime, timedelta
+import ccxt.async_support as ccxt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exchange_manager import ExchangeManager, ExchangeFactory
 from app.core.portfolio_manager import PortfolioManager
 from app.core.order_executor import OrderExecutor
 from app.core.event_bus import get_event_bus, EventType
-from app.core.error_recovery import CircuitBreaker, RetryPolicy, ErrorTracker, RateLimiter
+from app.core.error_recovery import CircuitBreaker, RetryPolicy, ErrorTracker, TokenBucket
 from app.data.market_data import MarketDataManager
 from app.strategies.base import BaseStrategy, Signal
 from app.models.database import AsyncSessionLocal
@@ -36,6 +40,8 @@ class TradingBot:
         
         # Active strategies
         self.strategies: Dict[str, BaseStrategy] = {}
+        # get_status() entries per strategy, rebuilt after add/remove
+        self._strategy_status: Optional[List[Dict]] = None
         
         # Task management
         self.tasks: Set[asyncio.Task] = set()
@@ -48,17 +54,42 @@ class TradingBot:
         # Error recovery
         self.circuit_breaker = CircuitBreaker(
             failure_threshold=5,
-            recovery_timeout=60
+            recovery_timeout=60,
+            name="trading_bot"
         )
         self.retry_policy = RetryPolicy(
             max_attempts=3,
-            initial_delay=1.0
+            initial_delay=1.0,
+            max_delay=10.0,
+            # Only transient failures are worth sleeping on
+            errors_to_retry=(ccxt.NetworkError, asyncio.TimeoutError)
         )
         self.error_tracker = ErrorTracker(window_size=3600)
-        self.rate_limiter = RateLimiter(max_calls=100, time_window=60)
+        # Pause when more than this fraction of strategy runs failed recently;
+        # the window spans several ticks so a single strategy reaches min_attempts
+        self.error_rate_threshold = 0.5
+        self.error_rate_window_ticks = 10  # in update_interval periods
+        self.error_rate_min_attempts = 5
+        self.rate_limiter = TokenBucket(capacity=100, rate=100 / 60)
+        self.strategy_semaphore = asyncio.Semaphore(settings.max_concurrent_strategies)
+        # Orders stay serialized so risk checks see every earlier fill
+        self.execution_lock = asyncio.Lock()
+        
+        # Fetched frames are handed to signal workers through a bounded queue,
+        # so analysis and orders overlap with the remaining fetches
+        self.signal_workers = 4
+        self.signal_queue: asyncio.Queue = asyncio.Queue(
+            maxsize=2 * settings.max_concurrent_strategies
+        )
+        
+        # Stop loss/take profit closes in flight at once (exchange allows ~10 requests/s)
+        self.close_semaphore = asyncio.Semaphore(10)
+        
+        # Indicator math runs here while the bot is running (TA-Lib releases the GIL)
+        self._indicator_pool: Optional[ThreadPoolExecutor] = None
         
         # Health tracking
-        self.last_successful_update = datetime.utcnow()
+        self.last_successful_update_ts = time.monotonic()  # immune to wall-clock jumps
         self.consecutive_errors = 0
         
         log.info("TradingBot orchestrator initialized")
@@ -77,7 +108,8 @@ class TradingBot:
             log.info(f"Connected to {exchange_name} exchange")
             
             # Initialize market data manager
-            self.market_data = MarketDataManager(self.exchange)
+            # Frames live at most one tick, so each tick sees the forming candle's latest close
+            self.market_data = MarketDataManager(self.exchange, frame_ttl=self.update_interval)
             
             # Initialize portfolio and executor with database session
             async with AsyncSessionLocal() as db:
@@ -97,6 +129,7 @@ class TradingBot:
         key = f"{strategy.name}:{strategy.symbol}"
         self.strategies[key] = strategy
         strategy.is_active = True
+        self._strategy_status = None
         log.info(f"Added strategy: {strategy.name} for {strategy.symbol}")
     
     def remove_strategy(self, strategy_name: str, symbol: str):
@@ -105,6 +138,7 @@ class TradingBot:
         if key in self.strategies:
             self.strategies[key].is_active = False
             del self.strategies[key]
+            self._strategy_status = None
             log.info(f"Removed strategy: {strategy_name} for {symbol}")
     
     async def start(self):
@@ -119,10 +153,15 @@ class TradingBot:
         self.is_running = True
         self.is_paused = False
         
+        self._indicator_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='indicators')
+        self.market_data.indicator_executor = self._indicator_pool
+        
         # Start background tasks
         self.tasks.add(asyncio.create_task(self._strategy_execution_loop()))
         self.tasks.add(asyncio.create_task(self._position_monitoring_loop()))
         self.tasks.add(asyncio.create_task(self._portfolio_update_loop()))
+        for _ in range(self.signal_workers):
+            self.tasks.add(asyncio.create_task(self._signal_worker()))
         
         await self.event_bus.emit(
             EventType.BOT_STARTED,
@@ -147,6 +186,15 @@ class TradingBot:
         await asyncio.gather(*self.tasks, return_exceptions=True)
         self.tasks.clear()
         
+        # Drop strategies queued by the cancelled tick
+        while not self.signal_queue.empty():
+            self.signal_queue.get_nowait()
+            self.signal_queue.task_done()
+        
+        self.market_data.indicator_executor = None
+        self._indicator_pool.shutdown(wait=False)
+        self._indicator_pool = None
+        
         await self.event_bus.emit(
             EventType.BOT_STOPPED,
             {"timestamp": datetime.utcnow().isoformat()}
@@ -184,83 +232,153 @@ class TradingBot:
                 await asyncio.sleep(5)  # Brief pause before retry
     
     async def _run_strategies(self):
-        """Run all active strategies"""
-        for key, strategy in list(self.strategies.items()):
+        """Fetch market data for all active strategies and queue them for the signal workers"""
+        active = [
+            (key, strategy)
+            for key, strategy in list(self.strategies.items())
+            if strategy.is_active
+        ]
+        if not active:
+            return
+        
+        # Fetch each (symbol, timeframe) once, shared by every strategy on it
+        by_pair = defaultdict(list)
+        for key, strategy in active:
+            by_pair[(strategy.symbol, strategy.timeframe)].append((key, strategy))
+        
+        # One session, portfolio and executor for every signal this tick;
+        # execution_lock keeps their use sequential
+        async with AsyncSessionLocal() as db:
+            portfolio = PortfolioManager(db)
+            await portfolio.initialize(self.portfolio.current_balance)
+            executor = OrderExecutor(self.exchange, portfolio, db)
+            
+            async def produce(symbol: str, timeframe: str, strategies):
+                try:
+                    df = await self._fetch_market_data(symbol, timeframe)
+                except Exception as e:
+                    df = e
+                for key, strategy in strategies:
+                    # put() waits while the workers are behind
+                    await self.signal_queue.put((key, strategy, df, portfolio, executor))
+            
+            await asyncio.gather(
+                *(produce(symbol, timeframe, strategies) for (symbol, timeframe), strategies in by_pair.items())
+            )
+            
+            # Keep the session open until every queued strategy has run
+            await self.signal_queue.join()
+    
+    async def _signal_worker(self):
+        """Analyze queued strategies and execute their signals"""
+        while True:
+            item = await self.signal_queue.get()
             try:
-                if not strategy.is_active:
-                    continue
-                
-                # Rate limit API calls
-                await self.rate_limiter.acquire()
-                
-                # Fetch market data with retry
-                df = await self.retry_policy.execute(
-                    self.market_data.get_ohlcv_df,
-                    symbol=strategy.symbol,
-                    timeframe=strategy.timeframe,
-                    limit=200,
-                    with_indicators=True
-                )
+                await self._run_one(*item)
+            except Exception as e:
+                log.error(f"Unhandled error running strategy: {e}")
+            finally:
+                self.signal_queue.task_done()
+    
+    async def _fetch_market_data(self, symbol: str, timeframe: str):
+        """Fetch candles with indicators for one symbol and timeframe"""
+        async with self.strategy_semaphore:
+            # Rate limit API calls
+            await self.rate_limiter.acquire()
+            
+            # Fetch market data with retry
+            return await self.retry_policy.execute(
+                self.market_data.get_ohlcv_df,
+                symbol=symbol,
+                timeframe=timeframe,
+                limit=200,
+                with_indicators=True
+            )
+    
+    async def _run_one(
+        self,
+        key: str,
+        strategy: BaseStrategy,
+        df,
+        portfolio: PortfolioManager,
+        executor: OrderExecutor
+    ):
+        """Analyze one strategy's data and act on the signal"""
+        async with self.strategy_semaphore:
+            self.error_tracker.record_attempt("strategy_execution")
+            try:
+                if isinstance(df, Exception):
+                    # The shared fetch failed; count it against this strategy
+                    raise df
                 
                 if df.empty:
                     log.warning(f"No data available for {strategy.symbol}")
-                    continue
+                    return
                 
                 # Generate signal
                 signal = await strategy.analyze(df)
                 
                 # Validate signal
                 if not strategy.validate_signal(signal, df):
-                    continue
+                    return
                 
                 # Execute trade based on signal
-                await self._execute_signal(strategy, signal, df)
+                async with self.execution_lock:
+                    await self._execute_signal(strategy, signal, df, portfolio, executor)
                 
                 # Update strategy state
                 strategy.update_signal(signal)
                 
                 # Mark successful update
-                self.last_successful_update = datetime.utcnow()
+                self.last_successful_update_ts = time.monotonic()
                 self.consecutive_errors = 0
                 
             except Exception as e:
-                self.consecutive_errors += 1
+                self.consecutive_errors += 1  # observability only
                 self.error_tracker.record_error("strategy_execution", str(e))
                 log.error(f"Error running strategy {key}: {e}")
                 
-                # Check if we should stop due to too many errors
-                if self.consecutive_errors >= 10:
-                    log.critical("Too many consecutive errors, pausing bot")
+                # Pause on a sustained failure ratio rather than a streak,
+                # which a single lucky success would reset
+                error_rate = self.error_tracker.rate_in_last(
+                    "strategy_execution",
+                    self.error_rate_window_ticks * self.update_interval,
+                    min_attempts=self.error_rate_min_attempts
+                )
+                if error_rate > self.error_rate_threshold and not self.is_paused:
+                    log.critical(f"Strategy error rate {error_rate:.0%}, pausing bot")
                     self.pause()
                     await self.event_bus.emit(
-                        EventType.ERROR,
+                        EventType.STRATEGY_ERROR,
                         {
-                            "message": "Bot paused due to consecutive errors",
+                            "message": "Bot paused due to strategy error rate",
+                            "error_rate": error_rate,
                             "consecutive_errors": self.consecutive_errors
                         }
                     )
     
-    async def _execute_signal(self, strategy: BaseStrategy, signal: Signal, df):
+    async def _execute_signal(
+        self,
+        strategy: BaseStrategy,
+        signal: Signal,
+        df,
+        portfolio: PortfolioManager,
+        executor: OrderExecutor
+    ):
         """Execute a trading signal"""
         try:
-            async with AsyncSessionLocal() as db:
-                # Reinitialize portfolio and executor with new session
-                portfolio = PortfolioManager(db)
-                await portfolio.initialize(self.portfolio.current_balance)
-                executor = OrderExecutor(self.exchange, portfolio, db)
+            # Check if we have an open position
+            position = await portfolio.get_position(
+                self.exchange_name,
+                strategy.symbol
+            )
+            
+            if signal == Signal.BUY and not position:
+                await self._execute_buy(strategy, df, executor, portfolio)
                 
-                # Check if we have an open position
-                position = await portfolio.get_position(
-                    self.exchange_name,
-                    strategy.symbol
-                )
+            elif signal == Signal.SELL and position:
+                await self._execute_sell(strategy, position, executor)
                 
-                if signal == Signal.BUY and not position:
-                    await self._execute_buy(strategy, df, executor, portfolio)
-                    
-                elif signal == Signal.SELL and position:
-                    await self._execute_sell(strategy, position, executor)
-                    
         except Exception as e:
             log.error(f"Error executing signal: {e}")
     
@@ -277,10 +395,14 @@ class TradingBot:
             if not entry_price:
                 return
             
+            # Calculate stop loss and take profit
+            stop_loss = strategy.get_stop_loss(entry_price, 'long')
+            take_profit = strategy.get_take_profit(entry_price, 'long')
+            
             # Calculate position size
             position_size = portfolio.calculate_position_size(
                 entry_price=entry_price,
-                stop_loss=strategy.get_stop_loss(entry_price, 'long')
+                stop_loss=stop_loss
             )
             
             # Check if we can open position
@@ -295,10 +417,6 @@ class TradingBot:
                 )
                 return
             
-            # Calculate stop loss and take profit
-            stop_loss = strategy.get_stop_loss(entry_price, 'long')
-            take_profit = strategy.get_take_profit(entry_price, 'long')
-            
             # Execute buy order
             trade = await executor.execute_market_buy(
                 symbol=strategy.symbol,
@@ -376,25 +494,41 @@ class TradingBot:
                     return
                 
                 # Get current prices
-                symbols = list(set(p.symbol for p in positions))
-                prices = await self.market_data.get_multiple_prices(symbols)
+                prices = await self.market_data.get_multiple_prices({p.symbol for p in positions})
                 
                 # Update position prices
                 await portfolio.update_position_prices(prices)
                 
                 # Check each position for exit conditions
-                executor = OrderExecutor(self.exchange, portfolio, db)
-                
+                to_close = []
                 for position in positions:
-                    if position.symbol not in prices:
+                    # Positions without a fresh price keep their last state
+                    if prices.get(position.symbol) is None:
                         continue
                     
-                    current_price = prices[position.symbol]
                     should_close, reason = position.should_close()
                     
                     if should_close:
                         log.info(f"Closing position {position.symbol}: {reason}")
-                        await executor.close_position(position, reason=reason)
+                        to_close.append((position, reason))
+                
+                if not to_close:
+                    return
+                
+                # Close independently so one slow order doesn't hold up the rest
+                executor = OrderExecutor(self.exchange, portfolio, db)
+                
+                async def close(position, reason: str):
+                    async with self.close_semaphore:
+                        return await executor.close_position(position, reason=reason)
+                
+                results = await asyncio.gather(
+                    *(close(position, reason) for position, reason in to_close),
+                    return_exceptions=True
+                )
+                for (position, _), result in zip(to_close, results):
+                    if isinstance(result, Exception):
+                        log.error(f"Error closing position {position.symbol}: {result}")
                         
         except Exception as e:
             log.error(f"Error checking positions: {e}")
@@ -432,7 +566,13 @@ class TradingBot:
             "is_paused": self.is_paused,
             "exchange": self.exchange_name,
             "active_strategies": len(self.strategies),
-            "strategies": [
+            "strategies": self._get_strategy_status()
+        }
+    
+    def _get_strategy_status(self) -> List[Dict]:
+        """Per-strategy status entries; shared between calls, so read-only"""
+        if self._strategy_status is None:
+            self._strategy_status = [
                 {
                     "name": strategy.name,
                     "symbol": strategy.symbol,
@@ -441,12 +581,20 @@ class TradingBot:
                 }
                 for strategy in self.strategies.values()
             ]
-        }
+        else:
+            # is_active can be toggled on the strategy itself
+            for entry, strategy in zip(self._strategy_status, self.strategies.values()):
+                entry["is_active"] = strategy.is_active
+        return self._strategy_status
+    
+    @property
+    def last_successful_update(self) -> datetime:
+        """Wall-clock time of the last successful strategy update"""
+        return datetime.utcnow() - timedelta(seconds=time.monotonic() - self.last_successful_update_ts)
     
     def get_health(self) -> Dict:
         """Get bot health status"""
-        now = datetime.utcnow()
-        time_since_update = (now - self.last_successful_update).total_seconds()
+        time_since_update = time.monotonic() - self.last_successful_update_ts
         
         # Determine health status
         if not self.is_running:
@@ -467,7 +615,7 @@ class TradingBot:
             "last_successful_update": self.last_successful_update.isoformat(),
             "time_since_update_seconds": time_since_update,
             "consecutive_errors": self.consecutive_errors,
-            "circuit_breaker_state": self.circuit_breaker.state.value,
+            "circuit_breaker_state": self.circuit_breaker.state.name.lower(),
             "error_counts": self.error_tracker.get_all_errors()
         }
     
@@ -1,6 +1,7 @@
 """
 Technical indicators wrapper using TA-Lib and pandas-ta
 """
+import threading
 import pandas as pd
 import numpy as np
 from typing import Optional, Tuple
@@ -11,9 +12,14 @@ except ImportError:
     TALIB_AVAILABLE = False
     import pandas_ta as ta
 
+from app.data.indicators_numba import NUMBA_AVAILABLE, rsi_nb, macd_nb, atr_nb, adx_nb, obv_nb
 from app.utils.logger import log
 
 
+# Storage dtype of the indicator columns added by add_all_indicators
+INDICATOR_DTYPE = np.float32
+
+
 class TechnicalIndicators:
     """Technical indicators calculator"""
     
@@ -38,6 +44,8 @@ class TechnicalIndicators:
         """Relative Strength Index"""
         if TALIB_AVAILABLE:
             return pd.Series(talib.RSI(data.values, timeperiod=period), index=data.index)
+        elif NUMBA_AVAILABLE:
+            return pd.Series(rsi_nb(data.to_numpy(dtype=np.float64), period), index=data.index)
         else:
             delta = data.diff()
             gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
@@ -65,6 +73,13 @@ class TechnicalIndicators:
                 pd.Series(signal_line, index=data.index),
                 pd.Series(hist, index=data.index)
             )
+        elif NUMBA_AVAILABLE:
+            macd, signal_line, hist = macd_nb(data.to_numpy(dtype=np.float64), fast, slow, signal)
+            return (
+                pd.Series(macd, index=data.index),
+                pd.Series(signal_line, index=data.index),
+                pd.Series(hist, index=data.index)
+            )
         else:
             exp1 = data.ewm(span=fast, adjust=False).mean()
             exp2 = data.ewm(span=slow, adjust=False).mean()
@@ -112,6 +127,16 @@ class TechnicalIndicators:
                 talib.ATR(high.values, low.values, close.values, timeperiod=period),
                 index=close.index
             )
+        elif NUMBA_AVAILABLE:
+            return pd.Series(
+                atr_nb(
+                    high.to_numpy(dtype=np.float64),
+                    low.to_numpy(dtype=np.float64),
+                    close.to_numpy(dtype=np.float64),
+                    period
+                ),
+                index=close.index
+            )
         else:
             tr1 = high - low
             tr2 = abs(high - close.shift())
@@ -161,6 +186,16 @@ class TechnicalIndicators:
                 talib.ADX(high.values, low.values, close.values, timeperiod=period),
                 index=close.index
             )
+        elif NUMBA_AVAILABLE:
+            return pd.Series(
+                adx_nb(
+                    high.to_numpy(dtype=np.float64),
+                    low.to_numpy(dtype=np.float64),
+                    close.to_numpy(dtype=np.float64),
+                    period
+                ),
+                index=close.index
+            )
         else:
             # Simplified ADX calculation
             plus_dm = high.diff()
@@ -187,9 +222,19 @@ class TechnicalIndicators:
                 talib.OBV(close.values, volume.values),
                 index=close.index
             )
+        elif NUMBA_AVAILABLE:
+            return pd.Series(
+                obv_nb(close.to_numpy(dtype=np.float64), volume.to_numpy(dtype=np.float64)),
+                index=close.index
+            )
         else:
-            obv = (np.sign(close.diff()) * volume).fillna(0).cumsum()
-            return obv
+            c = close.to_numpy(dtype=np.float64)
+            v = volume.to_numpy(dtype=np.float64)
+            d = np.empty_like(c)
+            d[:1] = 0.0
+            np.subtract(c[1:], c[:-1], out=d[1:])
+            signed = np.where(d > 0, v, np.where(d < 0, -v, 0.0))
+            return pd.Series(signed.cumsum(), index=close.index)
     
     @staticmethod
     def calculate_vwap(
@@ -205,12 +250,20 @@ class TechnicalIndicators:
     @staticmethod
     def detect_crossover(fast: pd.Series, slow: pd.Series) -> pd.Series:
         """Detect bullish crossover (fast crosses above slow)"""
-        return (fast > slow) & (fast.shift(1) <= slow.shift(1))
+        f = fast.to_numpy()
+        s = slow.to_numpy()
+        out = np.zeros(len(f), dtype=bool)
+        out[1:] = (f[1:] > s[1:]) & (f[:-1] <= s[:-1])
+        return pd.Series(out, index=fast.index)
     
     @staticmethod
     def detect_crossunder(fast: pd.Series, slow: pd.Series) -> pd.Series:
         """Detect bearish crossunder (fast crosses below slow)"""
-        return (fast < slow) & (fast.shift(1) >= slow.shift(1))
+        f = fast.to_numpy()
+        s = slow.to_numpy()
+        out = np.zeros(len(f), dtype=bool)
+        out[1:] = (f[1:] < s[1:]) & (f[:-1] >= s[:-1])
+        return pd.Series(out, index=fast.index)
     
     @staticmethod
     def calculate_support_resistance(
@@ -251,42 +304,245 @@ class TechnicalIndicators:
         if df.empty:
             return df
         
-        df = df.copy()
-        
-        # Moving averages
-        df['sma_20'] = TechnicalIndicators.calculate_sma(df['close'], 20)
-        df['sma_50'] = TechnicalIndicators.calculate_sma(df['close'], 50)
-        df['ema_12'] = TechnicalIndicators.calculate_ema(df['close'], 12)
-        df['ema_26'] = TechnicalIndicators.calculate_ema(df['close'], 26)
+        if TALIB_AVAILABLE:
+            columns = TechnicalIndicators._talib_indicator_columns(df)
+        else:
+            columns = TechnicalIndicators._pandas_indicator_columns(df)
         
-        # RSI
-        df['rsi'] = TechnicalIndicators.calculate_rsi(df['close'], 14)
+        # Indicators only feed signal comparisons, so float32 halves their
+        # footprint; prices stay float64 since orders are priced from them
+        columns = {name: values.astype(INDICATOR_DTYPE) for name, values in columns.items()}
         
-        # MACD
-        df['macd'], df['macd_signal'], df['macd_hist'] = TechnicalIndicators.calculate_macd(df['close'])
+        # assign() builds the new frame once with the shared index
+        df = df.assign(**columns)
         
-        # Bollinger Bands
-        df['bb_upper'], df['bb_middle'], df['bb_lower'] = TechnicalIndicators.calculate_bollinger_bands(df['close'])
+        log.debug(f"Added all indicators to dataframe ({len(df)} rows)")
         
-        # ATR
-        df['atr'] = TechnicalIndicators.calculate_atr(df['high'], df['low'], df['close'])
+        return df
+    
+    @staticmethod
+    def _talib_indicator_columns(df: pd.DataFrame) -> dict:
+        """Compute indicator columns with TA-Lib on raw float64 arrays"""
+        close = df['close'].to_numpy(dtype=np.float64)
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
         
-        # Stochastic
-        df['stoch_k'], df['stoch_d'] = TechnicalIndicators.calculate_stochastic(
-            df['high'], df['low'], df['close']
+        macd, macd_signal, macd_hist = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
+        bb_upper, bb_middle, bb_lower = talib.BBANDS(close, timeperiod=20, nbdevup=2.0, nbdevdn=2.0)
+        stoch_k, stoch_d = talib.STOCH(
+            high, low, close, fastk_period=14, slowk_period=3, slowd_period=3
         )
         
-        # ADX
-        df['adx'] = TechnicalIndicators.calculate_adx(df['high'], df['low'], df['close'])
+        columns = {
+            'sma_20': talib.SMA(close, timeperiod=20),
+            'sma_50': talib.SMA(close, timeperiod=50),
+            'ema_12': talib.EMA(close, timeperiod=12),
+            'ema_26': talib.EMA(close, timeperiod=26),
+            'rsi': talib.RSI(close, timeperiod=14),
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd_hist,
+            'bb_upper': bb_upper,
+            'bb_middle': bb_middle,
+            'bb_lower': bb_lower,
+            'atr': talib.ATR(high, low, close, timeperiod=14),
+            'stoch_k': stoch_k,
+            'stoch_d': stoch_d,
+            'adx': talib.ADX(high, low, close, timeperiod=14),
+        }
         
-        # Volume indicators
         if 'volume' in df.columns:
-            df['obv'] = TechnicalIndicators.calculate_obv(df['close'], df['volume'])
-            df['vwap'] = TechnicalIndicators.calculate_vwap(
-                df['high'], df['low'], df['close'], df['volume']
-            )
+            columns.update(TechnicalIndicators._talib_volume_columns(df, close, high, low))
         
-        log.debug(f"Added all indicators to dataframe ({len(df)} rows)")
+        return columns
+    
+    @staticmethod
+    def _talib_volume_columns(df: pd.DataFrame, close: np.ndarray, high: np.ndarray, low: np.ndarray) -> dict:
+        """OBV and VWAP, which accumulate from the first row of the frame"""
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        typical_price = (high + low + close) / 3
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = np.cumsum(typical_price * volume) / np.cumsum(volume)
+        return {
+            'obv': talib.OBV(close, volume),
+            'vwap': vwap,
+        }
+    
+    @staticmethod
+    def _pandas_indicator_columns(df: pd.DataFrame) -> dict:
+        """Compute indicator columns with the pandas implementations"""
+        close, high, low = df['close'], df['high'], df['low']
         
-        return df
+        macd, macd_signal, macd_hist = TechnicalIndicators.calculate_macd(close)
+        bb_upper, bb_middle, bb_lower = TechnicalIndicators.calculate_bollinger_bands(close)
+        stoch_k, stoch_d = TechnicalIndicators.calculate_stochastic(high, low, close)
+        
+        columns = {
+            'sma_20': TechnicalIndicators.calculate_sma(close, 20),
+            'sma_50': TechnicalIndicators.calculate_sma(close, 50),
+            'ema_12': TechnicalIndicators.calculate_ema(close, 12),
+            'ema_26': TechnicalIndicators.calculate_ema(close, 26),
+            'rsi': TechnicalIndicators.calculate_rsi(close, 14),
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd_hist,
+            'bb_upper': bb_upper,
+            'bb_middle': bb_middle,
+            'bb_lower': bb_lower,
+            'atr': TechnicalIndicators.calculate_atr(high, low, close),
+            'stoch_k': stoch_k,
+            'stoch_d': stoch_d,
+            'adx': TechnicalIndicators.calculate_adx(high, low, close),
+        }
+        
+        if 'volume' in df.columns:
+            volume = df['volume']
+            columns['obv'] = TechnicalIndicators.calculate_obv(close, volume)
+            columns['vwap'] = TechnicalIndicators.calculate_vwap(high, low, close, volume)
+        
+        return columns
 
+
+# (output columns, TA-Lib function, inputs, parameters) for the streamed indicators;
+# inputs are 'c' for close only or 'hlc' for high, low, close
+_STREAM_SPECS = (
+    (('sma_20',), 'SMA', 'c', {'timeperiod': 20}),
+    (('sma_50',), 'SMA', 'c', {'timeperiod': 50}),
+    (('ema_12',), 'EMA', 'c', {'timeperiod': 12}),
+    (('ema_26',), 'EMA', 'c', {'timeperiod': 26}),
+    (('rsi',), 'RSI', 'c', {'timeperiod': 14}),
+    (('macd', 'macd_signal', 'macd_hist'), 'MACD', 'c', {'fastperiod': 12, 'slowperiod': 26, 'signalperiod': 9}),
+    (('bb_upper', 'bb_middle', 'bb_lower'), 'BBANDS', 'c', {'timeperiod': 20, 'nbdevup': 2.0, 'nbdevdn': 2.0}),
+    (('atr',), 'ATR', 'hlc', {'timeperiod': 14}),
+    (('stoch_k', 'stoch_d'), 'STOCH', 'hlc', {'fastk_period': 14, 'slowk_period': 3, 'slowd_period': 3}),
+    (('adx',), 'ADX', 'hlc', {'timeperiod': 14}),
+)
+
+
+class IncrementalIndicators:
+    """
+    add_all_indicators for the rolling OHLCV window of one symbol/timeframe
+    
+    TA-Lib stream handles are kept positioned at the last closed candle. When
+    the next frame only appends candles, the newly closed ones are fed to the
+    handles and the forming one is peeked, so only the appended rows are
+    computed instead of every indicator over the whole window. Anything else
+    falls back to add_all_indicators.
+    """
+    
+    def __init__(self):
+        self.frame: Optional[pd.DataFrame] = None
+        self._frame_key = None
+        self._streams = None
+        # compute() may run on worker threads
+        self._lock = threading.Lock()
+    
+    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return df with all indicators added"""
+        if df.empty:
+            return TechnicalIndicators.add_all_indicators(df)
+        
+        # Same window and same forming candle as last time: nothing to compute
+        key = (
+            df.index[0],
+            df.index[-1],
+            len(df),
+            df['close'].iat[-1],
+            df['volume'].iat[-1] if 'volume' in df.columns else None
+        )
+        
+        with self._lock:
+            if key == self._frame_key:
+                return self.frame
+            
+            if TALIB_AVAILABLE:
+                self._compute(df)
+            else:
+                self.frame = TechnicalIndicators.add_all_indicators(df)
+            self._frame_key = key
+            return self.frame
+    
+    def _compute(self, df: pd.DataFrame):
+        columns = None
+        if self._streams is not None:
+            try:
+                columns = self._advance(df)
+            except Exception as e:
+                log.debug(f"Incremental indicator update failed, recomputing: {e}")
+        
+        if columns is None:
+            result = TechnicalIndicators.add_all_indicators(df)
+            self._open_streams(result)
+        else:
+            result = df.assign(**columns)
+        
+        self.frame = result
+    
+    @staticmethod
+    def _inputs(df: pd.DataFrame) -> dict:
+        close = df['close'].to_numpy(dtype=np.float64)
+        return {
+            'c': (close,),
+            'hlc': (df['high'].to_numpy(dtype=np.float64), df['low'].to_numpy(dtype=np.float64), close),
+        }
+    
+    def _open_streams(self, result: pd.DataFrame):
+        """Open stream handles on every candle but the forming one"""
+        history = {
+            kind: tuple(array[:-1] for array in arrays)
+            for kind, arrays in self._inputs(result).items()
+        }
+        try:
+            self._streams = [
+                getattr(talib.stream, function)(*history[kind], **params)
+                for _, function, kind, params in _STREAM_SPECS
+            ]
+        except Exception as e:
+            # Usually too little history yet
+            log.debug(f"Indicator streams not opened: {e}")
+            self._streams = None
+    
+    def _advance(self, df: pd.DataFrame) -> Optional[dict]:
+        """Indicator columns for df reusing the previous frame, or None"""
+        previous = self.frame
+        n = len(df)
+        if n < 3:
+            return None
+        
+        # Number of candles appended since previous; 0 when the same forming
+        # candle was refetched
+        last = df.index.get_indexer([previous.index[-1]])[0]
+        if last < 0:
+            return None
+        shift = n - 1 - last
+        
+        # The window slides, so df may start a few candles after previous
+        start = previous.index.get_indexer([df.index[0]])[0]
+        if start < 0 or len(previous) - start != n - shift:
+            return None
+        
+        inputs = self._inputs(df)
+        columns = {}
+        for handle, (names, _, kind, _) in zip(self._streams, _STREAM_SPECS):
+            arrays = inputs[kind]
+            # previous' forming candle and any appended after it have closed;
+            # commit them to the handle
+            rows = [
+                handle.update(*(array[i] for array in arrays))
+                for i in range(last, n - 1)
+            ]
+            rows.append(handle.peek(*(array[-1] for array in arrays)))
+            
+            reused = n - len(rows)
+            for i, name in enumerate(names):
+                values = np.empty(n, dtype=INDICATOR_DTYPE)
+                values[:reused] = previous[name].to_numpy()[start:start + reused]
+                values[reused:] = [row[i] if len(names) > 1 else row for row in rows]
+                columns[name] = values
+        
+        if 'volume' in df.columns:
+            close, high, low = inputs['c'][0], inputs['hlc'][0], inputs['hlc'][1]
+            for name, values in TechnicalIndicators._talib_volume_columns(df, close, high, low).items():
+                columns[name] = values.astype(INDICATOR_DTYPE)
+        
+        return columns
@@ -0,0 +1,152 @@
+"""
+Numba kernels for the pandas fallback indicators (used when TA-Lib is missing)
+
+Each kernel reproduces the matching pandas implementation in
+TechnicalIndicators on float64 arrays, including where the leading NaNs fall.
+"""
+import numpy as np
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in so the kernels still import (and run) as plain Python"""
+        return lambda func: func
+
+
+# fastmath without the no-NaN/no-inf flags: the outputs carry leading NaNs and
+# error_model='numpy' lets divisions by zero produce inf/NaN like pandas does
+_JIT_OPTIONS = dict(cache=True, fastmath={'reassoc', 'contract', 'arcp'}, error_model='numpy')
+
+
+@njit(**_JIT_OPTIONS)
+def rolling_mean_nb(arr, period):
+    """rolling(window=period).mean(): NaN until the window is full of values"""
+    n = len(arr)
+    out = np.empty(n)
+    total = 0.0
+    nans = 0
+    for i in range(n):
+        value = arr[i]
+        if np.isnan(value):
+            nans += 1
+        else:
+            total += value
+
+        if i >= period:
+            old = arr[i - period]
+            if np.isnan(old):
+                nans -= 1
+            else:
+                total -= old
+
+        if i >= period - 1 and nans == 0:
+            out[i] = total / period
+        else:
+            out[i] = np.nan
+    return out
+
+
+@njit(**_JIT_OPTIONS)
+def rsi_nb(close, period):
+    """Relative Strength Index over simple averages of gains and losses"""
+    n = len(close)
+    gains = np.zeros(n)
+    losses = np.zeros(n)
+    for i in range(1, n):
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            gains[i] = delta
+        elif delta < 0:
+            losses[i] = -delta
+
+    avg_gain = rolling_mean_nb(gains, period)
+    avg_loss = rolling_mean_nb(losses, period)
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+@njit(**_JIT_OPTIONS)
+def macd_nb(close, fast, slow, signal):
+    """MACD, signal and histogram from ewm(adjust=False) averages in one pass"""
+    n = len(close)
+    macd = np.empty(n)
+    signal_line = np.empty(n)
+    if n == 0:
+        return macd, signal_line, macd - signal_line
+
+    alpha_fast = 2.0 / (fast + 1)
+    alpha_slow = 2.0 / (slow + 1)
+    alpha_signal = 2.0 / (signal + 1)
+
+    ema_fast = close[0]
+    ema_slow = close[0]
+    macd[0] = 0.0
+    signal_line[0] = 0.0
+    for i in range(1, n):
+        ema_fast = alpha_fast * close[i] + (1 - alpha_fast) * ema_fast
+        ema_slow = alpha_slow * close[i] + (1 - alpha_slow) * ema_slow
+        macd[i] = ema_fast - ema_slow
+        signal_line[i] = alpha_signal * macd[i] + (1 - alpha_signal) * signal_line[i - 1]
+    return macd, signal_line, macd - signal_line
+
+
+@njit(**_JIT_OPTIONS)
+def true_range_nb(high, low, close):
+    """True range; the first bar has no previous close and uses high - low"""
+    n = len(close)
+    tr = np.empty(n)
+    if n:
+        tr[0] = high[0] - low[0]
+    for i in range(1, n):
+        tr[i] = max(
+            high[i] - low[i],
+            abs(high[i] - close[i - 1]),
+            abs(low[i] - close[i - 1])
+        )
+    return tr
+
+
+@njit(**_JIT_OPTIONS)
+def atr_nb(high, low, close, period):
+    """Average True Range as a simple average of the true range"""
+    return rolling_mean_nb(true_range_nb(high, low, close), period)
+
+
+@njit(**_JIT_OPTIONS)
+def adx_nb(high, low, close, period):
+    """Simplified Average Directional Index"""
+    n = len(close)
+    plus_dm = np.empty(n)
+    minus_dm = np.empty(n)
+    if n:
+        plus_dm[0] = np.nan
+        minus_dm[0] = np.nan
+    for i in range(1, n):
+        plus_dm[i] = max(high[i] - high[i - 1], 0.0)
+        minus_dm[i] = max(low[i - 1] - low[i], 0.0)
+
+    atr = atr_nb(high, low, close, period)
+    plus_di = 100 * (rolling_mean_nb(plus_dm, period) / atr)
+    minus_di = 100 * (rolling_mean_nb(minus_dm, period) / atr)
+
+    dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    return rolling_mean_nb(dx, period)
+
+
+@njit(**_JIT_OPTIONS)
+def obv_nb(close, volume):
+    """On-Balance Volume starting from zero"""
+    n = len(close)
+    out = np.empty(n)
+    if n:
+        out[0] = 0.0
+    for i in range(1, n):
+        if close[i] > close[i - 1]:
+            out[i] = out[i - 1] + volume[i]
+        elif close[i] < close[i - 1]:
+            out[i] = out[i - 1] - volume[i]
+        else:
+            out[i] = out[i - 1]
+    return out
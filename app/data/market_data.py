@@ -1,21 +1,58 @@
 """
 Market data aggregation and management
 """
+import asyncio
+import time
+import numpy as np
 import pandas as pd
-from typing import Optional, List
-from datetime import datetime, timedelta
+import ccxt.async_support as ccxt
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Optional, Tuple, Iterable
 from app.core.exchange_manager import ExchangeManager
-from app.data.indicators import TechnicalIndicators
+from app.data.indicators import IncrementalIndicators
 from app.utils.logger import log
 
 
 class MarketDataManager:
     """Manages market data fetching and processing"""
     
-    def __init__(self, exchange: ExchangeManager):
+    def __init__(
+        self,
+        exchange: ExchangeManager,
+        no_data_ttl: float = 300,
+        indicator_executor: Optional[Executor] = None,
+        max_entries: int = 256,
+        frame_ttl: float = 60
+    ):
+        """
+        Args:
+            exchange: Exchange to fetch from
+            no_data_ttl: Seconds to remember that a symbol returned no candles
+            indicator_executor: Where to run indicator math; None runs it on the event loop
+            max_entries: Size of each cache; least recently used entries are evicted
+            frame_ttl: Seconds to reuse a fetched frame; its last candle is still forming
+        """
         self.exchange = exchange
-        self.cache = {}
-        self.last_update = {}
+        self.indicator_executor = indicator_executor
+        self.max_entries = max_entries
+        # "symbol:timeframe" -> (time.monotonic() of fetch, frame)
+        self.cache: "OrderedDict[str, Tuple[float, pd.DataFrame]]" = OrderedDict()
+        
+        # (symbol, timeframe, limit, with_indicators) -> (expires_at, frame)
+        self._ohlcv_cache: "OrderedDict[Tuple[str, str, int, bool], Tuple[float, pd.DataFrame]]" = OrderedDict()
+        self.no_data_ttl = no_data_ttl
+        self.frame_ttl = frame_ttl
+        
+        # Indicator state per (symbol, timeframe) so each new candle is computed incrementally
+        self._indicators: "OrderedDict[Tuple[str, str], IncrementalIndicators]" = OrderedDict()
+    
+    def _remember(self, cache: OrderedDict, key, value):
+        """Store value as the most recently used entry, evicting the oldest past max_entries"""
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_entries:
+            cache.popitem(last=False)
     
     async def get_ohlcv_df(
         self,
@@ -35,35 +72,62 @@ class MarketDataManager:
         
         Returns:
             DataFrame with OHLCV data and indicators
+        
+        Frames are reused for frame_ttl seconds (never past the current
+        candle's close), and empty responses for no_data_ttl seconds.
         """
+        cache_key = (symbol, timeframe, limit, with_indicators)
+        now = time.time()
+        cached = self._ohlcv_cache.get(cache_key)
+        if cached and now < cached[0]:
+            self._ohlcv_cache.move_to_end(cache_key)
+            return cached[1]
+        
         try:
             # Fetch OHLCV data
             ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
             
             if not ohlcv:
                 log.warning(f"No OHLCV data received for {symbol}")
-                return pd.DataFrame()
-            
-            # Convert to DataFrame
+                df = pd.DataFrame()
+                self._remember(self._ohlcv_cache, cache_key, (now + self.no_data_ttl, df))
+                return df
+            
+            # Convert to DataFrame through one float64 buffer, transposed so
+            # each column is contiguous, instead of parsing the rows as lists
+            columns = np.ascontiguousarray(np.asarray(ohlcv, dtype=np.float64).T)
+            # Millisecond timestamps viewed as datetime64 directly, skipping
+            # to_datetime's unit parsing
+            index = pd.DatetimeIndex(
+                columns[0].astype(np.int64).view('datetime64[ms]').astype('datetime64[ns]'),
+                name='timestamp'
+            )
             df = pd.DataFrame(
-                ohlcv,
-                columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
+                dict(zip(['open', 'high', 'low', 'close', 'volume'], columns[1:])),
+                index=index
             )
             
-            # Convert timestamp to datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            
             # Add technical indicators if requested
             if with_indicators:
-                df = TechnicalIndicators.add_all_indicators(df)
+                indicators = self._indicators.get((symbol, timeframe)) or IncrementalIndicators()
+                self._remember(self._indicators, (symbol, timeframe), indicators)
+                if self.indicator_executor is not None:
+                    loop = asyncio.get_running_loop()
+                    df = await loop.run_in_executor(self.indicator_executor, indicators.compute, df)
+                else:
+                    df = indicators.compute(df)
+            
+            # Cache briefly: the forming candle's close is the price entries,
+            # stops and sizes are computed from
+            timeframe_seconds = ccxt.Exchange.parse_timeframe(timeframe)
+            candle_close = (now // timeframe_seconds + 1) * timeframe_seconds
+            self._remember(
+                self._ohlcv_cache, cache_key, (min(now + self.frame_ttl, candle_close), df)
+            )
             
-            # Cache the data
-            cache_key = f"{symbol}:{timeframe}"
-            self.cache[cache_key] = df
-            self.last_update[cache_key] = datetime.utcnow()
+            self._remember(self.cache, f"{symbol}:{timeframe}", (time.monotonic(), df))
             
-            log.debug(f"Fetched {len(df)} candles for {symbol} ({timeframe})")
+            log.debug("Fetched {} candles for {} ({})", len(df), symbol, timeframe)
             
             return df
             
@@ -80,26 +144,38 @@ class MarketDataManager:
             log.error(f"Error fetching current price for {symbol}: {e}")
             return None
     
-    async def get_multiple_prices(self, symbols: List[str]) -> dict:
+    async def get_multiple_prices(self, symbols: Iterable[str]) -> dict:
         """Get current prices for multiple symbols"""
-        prices = {}
-        for symbol in symbols:
-            price = await self.get_current_price(symbol)
-            if price:
-                prices[symbol] = price
-        return prices
+        symbols = list(symbols)
+        results = await asyncio.gather(
+            *(self.get_current_price(symbol) for symbol in symbols),
+            return_exceptions=True
+        )
+        return {
+            symbol: price
+            for symbol, price in zip(symbols, results)
+            if price and not isinstance(price, BaseException)
+        }
     
     async def get_orderbook_spread(self, symbol: str) -> tuple[float, float, float]:
         """
         Get orderbook bid-ask spread
         Returns: (bid, ask, spread_percentage)
+        
+        Best bid/ask come from the (shared, briefly cached) ticker when the
+        exchange includes them; the order book is only fetched otherwise.
         """
         try:
-            orderbook = await self.exchange.fetch_orderbook(symbol, limit=1)
+            ticker = await self.exchange.fetch_ticker_cached(symbol, ttl=0.5)
+            bid, ask = ticker.get('bid'), ticker.get('ask')
+            
+            if not (bid and ask):
+                orderbook = await self.exchange.fetch_orderbook(symbol, limit=1)
+                if orderbook['bids'] and orderbook['asks']:
+                    bid = orderbook['bids'][0][0]
+                    ask = orderbook['asks'][0][0]
             
-            if orderbook['bids'] and orderbook['asks']:
-                bid = orderbook['bids'][0][0]
-                ask = orderbook['asks'][0][0]
+            if bid and ask:
                 spread_pct = ((ask - bid) / bid) * 100
                 return bid, ask, spread_pct
             
@@ -117,13 +193,15 @@ class MarketDataManager:
             if df.empty:
                 return {}
             
-            total_volume = df['volume'].sum()
-            avg_volume = df['volume'].mean()
-            current_volume = df['volume'].iloc[-1]
+            volume = df['volume'].to_numpy()
+            total_volume = volume.sum()
+            avg_volume = total_volume / len(volume)
+            current_volume = volume[-1]
             
-            # Volume trend (increasing/decreasing)
-            volume_sma = df['volume'].rolling(window=5).mean()
-            volume_trend = "increasing" if volume_sma.iloc[-1] > volume_sma.iloc[-5] else "decreasing"
+            # Volume trend (increasing/decreasing): the latest 5-candle average
+            # against the one ending 4 candles earlier (equal windows, so sums compare the same)
+            increasing = len(volume) >= 9 and volume[-5:].sum() > volume[-9:-4].sum()
+            volume_trend = "increasing" if increasing else "decreasing"
             
             return {
                 "total_volume": total_volume,
@@ -137,14 +215,25 @@ class MarketDataManager:
             log.error(f"Error calculating volume profile: {e}")
             return {}
     
-    def get_cached_data(self, symbol: str, timeframe: str, max_age_seconds: int = 60) -> Optional[pd.DataFrame]:
-        """Get cached data if fresh enough"""
-        cache_key = f"{symbol}:{timeframe}"
+    def get_cached_data(
+        self,
+        symbol: str,
+        timeframe: str,
+        max_age_seconds: Optional[float] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Get cached data if fresh enough
         
-        if cache_key in self.cache:
-            last_update = self.last_update.get(cache_key)
-            if last_update and (datetime.utcnow() - last_update).seconds < max_age_seconds:
-                return self.cache[cache_key]
+        max_age_seconds defaults to half the timeframe (at least 5 seconds),
+        so hourly and daily frames are not treated as stale after a minute.
+        """
+        if max_age_seconds is None:
+            max_age_seconds = max(5, ccxt.Exchange.parse_timeframe(timeframe) // 2)
+        key = f"{symbol}:{timeframe}"
+        entry = self.cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < max_age_seconds:
+            self.cache.move_to_end(key)
+            return entry[1]
         
         return None
     
@@ -154,8 +243,12 @@ class MarketDataManager:
             keys_to_remove = [k for k in self.cache.keys() if k.startswith(f"{symbol}:")]
             for key in keys_to_remove:
                 del self.cache[key]
-                del self.last_update[key]
+            for key in [k for k in self._ohlcv_cache if k[0] == symbol]:
+                del self._ohlcv_cache[key]
+            for key in [k for k in self._indicators if k[0] == symbol]:
+                del self._indicators[key]
         else:
             self.cache.clear()
-            self.last_update.clear()
+            self._ohlcv_cache.clear()
+            self._indicators.clear()
 
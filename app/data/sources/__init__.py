@@ -1,2 +1,25 @@
 """External data source integrations"""
+import asyncio
+from typing import Any, Dict
+from app.data.sources.coingecko import CoinGeckoClient
+from app.data.sources.defillama import DeFiLlamaClient
+from app.data.sources.dex_screener import DexScreenerClient
 
+
+async def fetch_market_overview() -> Dict[str, Any]:
+    """
+    Fetch CoinGecko global data, DeFi Llama TVL and DEX Screener latest pairs concurrently
+    
+    The clients share one pooled HTTP session, so the requests reuse its
+    connections. Each value is None when that source failed.
+    """
+    async with asyncio.TaskGroup() as tg:
+        global_data = tg.create_task(CoinGeckoClient().get_global_data())
+        tvl = tg.create_task(DeFiLlamaClient().get_tvl())
+        latest_pairs = tg.create_task(DexScreenerClient().get_latest_pairs())
+    
+    return {
+        'global': global_data.result(),
+        'tvl': tvl.result(),
+        'latest_pairs': latest_pairs.result(),
+    }
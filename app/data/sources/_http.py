@@ -0,0 +1,166 @@
+"""
+Shared HTTP session for the external data source clients
+"""
+import asyncio
+import random
+import time
+import aiohttp
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+from app.core.error_recovery import TokenBucket
+from app.utils.logger import log
+
+_session: Optional[aiohttp.ClientSession] = None
+
+# (url, params) -> (expires_at, etag, last_modified, payload), least recently used first
+_response_cache: "OrderedDict[Tuple, Tuple[float, Optional[str], Optional[str], Any]]" = OrderedDict()
+RESPONSE_CACHE_SIZE = 256
+
+# Statuses retried with backoff, and how often
+RETRY_STATUSES = (429, 503)
+RETRY_ATTEMPTS = 5
+MAX_RETRY_DELAY = 30.0
+
+
+# One bucket per API host (10 requests/s, bursts of 10), shared by every
+# client instance talking to it
+_limiters: Dict[str, TokenBucket] = {}
+
+
+def get_shared_session() -> aiohttp.ClientSession:
+    """Process-wide session so connections, TLS and DNS lookups are pooled"""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=20,
+            ttl_dns_cache=300,
+            keepalive_timeout=75
+        )
+        # A slow endpoint should not hold a pooled connection for aiohttp's 5 minute default
+        timeout = aiohttp.ClientTimeout(total=10, connect=3)
+        _session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    return _session
+
+
+async def close_shared_session():
+    """Close the shared session (on application shutdown)"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def get_limiter(url: str) -> TokenBucket:
+    """Rate limiter for the host of url"""
+    host = urlsplit(url).netloc
+    limiter = _limiters.get(host)
+    if limiter is None:
+        limiter = _limiters[host] = TokenBucket(capacity=10, rate=10)
+    return limiter
+
+
+def _retry_delay(response: aiohttp.ClientResponse, attempt: int) -> float:
+    """Retry-After when the server sends seconds, else jittered exponential backoff"""
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_RETRY_DELAY)
+        except ValueError:
+            pass
+    return min(2 ** attempt + random.random(), MAX_RETRY_DELAY)
+
+
+@asynccontextmanager
+async def rate_limited_get(
+    url: str,
+    params: Optional[dict] = None,
+    headers: Optional[dict] = None
+) -> AsyncIterator[aiohttp.ClientResponse]:
+    """
+    GET through the shared session, paced by the host's rate limiter
+    
+    429 and 503 responses are retried up to RETRY_ATTEMPTS times; the last
+    response is yielded whatever its status.
+    """
+    limiter = get_limiter(url)
+    session = get_shared_session()
+    for attempt in range(RETRY_ATTEMPTS):
+        await limiter.acquire()
+        response = await session.get(url, params=params, headers=headers)
+        if response.status not in RETRY_STATUSES or attempt == RETRY_ATTEMPTS - 1:
+            break
+        delay = _retry_delay(response, attempt)
+        response.release()
+        log.debug("{} returned {}, retrying in {:.1f}s", url, response.status, delay)
+        await asyncio.sleep(delay)
+    
+    try:
+        yield response
+    finally:
+        response.release()
+
+
+async def read_json(response: aiohttp.ClientResponse) -> Any:
+    """Decode a JSON response body straight from bytes (with orjson when installed)"""
+    return json_loads(await response.read())
+
+
+async def cached_get_json(
+    url: str,
+    ttl: float,
+    params: Optional[dict] = None,
+    headers: Optional[dict] = None
+) -> Tuple[int, Any]:
+    """
+    GET a JSON endpoint through the shared session, reusing the last response
+    
+    A response is served from memory for ttl seconds. After that the request
+    is revalidated with If-None-Match/If-Modified-Since, and a 304 keeps the
+    stored payload. Callers share the payload and must not mutate it.
+    
+    Returns:
+        (status, payload); payload is None unless status is 200
+    """
+    key = (url, tuple(sorted(params.items())) if params else None)
+    cached = _response_cache.get(key)
+    if cached is not None:
+        _response_cache.move_to_end(key)
+        if time.monotonic() < cached[0]:
+            return 200, cached[3]
+    
+    request_headers = dict(headers or {})
+    if cached is not None:
+        if cached[1]:
+            request_headers['If-None-Match'] = cached[1]
+        if cached[2]:
+            request_headers['If-Modified-Since'] = cached[2]
+    
+    async with rate_limited_get(url, params=params, headers=request_headers) as response:
+        etag = response.headers.get('ETag')
+        modified = response.headers.get('Last-Modified')
+        if response.status == 304 and cached is not None:
+            # Only the expiry is refreshed; a 304 need not repeat the validators,
+            # and its own Date must not replace the stored one
+            payload = cached[3]
+            etag = etag or cached[1]
+            modified = modified or cached[2]
+        elif response.status == 200:
+            payload = await read_json(response)
+            # Without Last-Modified (blockchain.com /stats), the response Date
+            # still lets the server answer 304 if nothing changed since
+            modified = modified or response.headers.get('Date')
+        else:
+            return response.status, None
+        
+        _response_cache[key] = (time.monotonic() + ttl, etag, modified, payload)
+        _response_cache.move_to_end(key)
+        if len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+        return 200, payload
@@ -2,7 +2,9 @@
 CoinGecko API integration for market data
 """
 import aiohttp
+from types import MappingProxyType
 from typing import Optional, Dict, List
+from app.data.sources._http import get_shared_session, cached_get_json, rate_limited_get, read_json
 from app.utils.logger import log
 from app.config import get_settings
 
@@ -14,40 +16,42 @@ class CoinGeckoClient:
     
     BASE_URL = "https://api.coingecko.com/api/v3"
     
+    # Fixed query parameters, built once instead of on every request
+    COIN_DATA_PARAMS = MappingProxyType({
+        'localization': 'false',
+        'tickers': 'false',
+        'market_data': 'true',
+        'community_data': 'true',
+        'developer_data': 'false'
+    })
+    PRICE_PARAMS = MappingProxyType({
+        'include_24hr_change': 'true',
+        'include_market_cap': 'true',
+        'include_24hr_vol': 'true'
+    })
+    
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or settings.coingecko_api_key
-        self.session: Optional[aiohttp.ClientSession] = None
+        # Sent per request since the session is shared with other clients
+        self.headers: Dict[str, str] = {}
+        if self.api_key:
+            self.headers['x-cg-pro-api-key'] = self.api_key
     
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create HTTP session"""
-        if self.session is None or self.session.closed:
-            headers = {}
-            if self.api_key:
-                headers['x-cg-pro-api-key'] = self.api_key
-            self.session = aiohttp.ClientSession(headers=headers)
-        return self.session
+        """Get the shared HTTP session"""
+        return get_shared_session()
     
     async def close(self):
-        """Close HTTP session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        """Nothing to release; the shared session is closed on shutdown"""
     
     async def get_coin_data(self, coin_id: str) -> Optional[Dict]:
         """Get comprehensive coin data"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/coins/{coin_id}"
-            params = {
-                'localization': 'false',
-                'tickers': 'false',
-                'market_data': 'true',
-                'community_data': 'true',
-                'developer_data': 'false'
-            }
             
-            async with session.get(url, params=params) as response:
+            async with rate_limited_get(url, params=self.COIN_DATA_PARAMS, headers=self.headers) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await read_json(response)
                 else:
                     log.warning(f"CoinGecko API error: {response.status}")
                     return None
@@ -58,19 +62,16 @@ class CoinGeckoClient:
     async def get_price(self, coin_ids: List[str], vs_currencies: List[str] = ['usd']) -> Optional[Dict]:
         """Get simple price for coins"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/simple/price"
             params = {
+                **self.PRICE_PARAMS,
                 'ids': ','.join(coin_ids),
-                'vs_currencies': ','.join(vs_currencies),
-                'include_24hr_change': 'true',
-                'include_market_cap': 'true',
-                'include_24hr_vol': 'true'
+                'vs_currencies': ','.join(vs_currencies)
             }
             
-            async with session.get(url, params=params) as response:
+            async with rate_limited_get(url, params=params, headers=self.headers) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await read_json(response)
                 else:
                     log.warning(f"CoinGecko API error: {response.status}")
                     return None
@@ -81,12 +82,11 @@ class CoinGeckoClient:
     async def get_trending(self) -> Optional[Dict]:
         """Get trending coins"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/search/trending"
             
-            async with session.get(url) as response:
+            async with rate_limited_get(url, headers=self.headers) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await read_json(response)
                 else:
                     log.warning(f"CoinGecko API error: {response.status}")
                     return None
@@ -103,7 +103,6 @@ class CoinGeckoClient:
     ) -> Optional[List[Dict]]:
         """Get market data for coins"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/coins/markets"
             params = {
                 'vs_currency': vs_currency,
@@ -113,9 +112,9 @@ class CoinGeckoClient:
                 'sparkline': 'false'
             }
             
-            async with session.get(url, params=params) as response:
+            async with rate_limited_get(url, params=params, headers=self.headers) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await read_json(response)
                 else:
                     log.warning(f"CoinGecko API error: {response.status}")
                     return None
@@ -126,16 +125,14 @@ class CoinGeckoClient:
     async def get_global_data(self) -> Optional[Dict]:
         """Get global cryptocurrency data"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/global"
             
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('data', {})
-                else:
-                    log.warning(f"CoinGecko API error: {response.status}")
-                    return None
+            status, data = await cached_get_json(url, ttl=300, headers=self.headers)
+            if status == 200:
+                return data.get('data', {})
+            else:
+                log.warning(f"CoinGecko API error: {status}")
+                return None
         except Exception as e:
             log.error(f"Error fetching global data from CoinGecko: {e}")
             return None
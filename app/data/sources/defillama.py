@@ -3,6 +3,7 @@ DeFi Llama API integration for DeFi protocol data
 """
 import aiohttp
 from typing import Optional, Dict, List
+from app.data.sources._http import get_shared_session, cached_get_json, rate_limited_get, read_json
 from app.utils.logger import log
 
 
@@ -11,32 +12,24 @@ class DeFiLlamaClient:
     
     BASE_URL = "https://api.llama.fi"
     
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
-    
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create HTTP session"""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
-        return self.session
+        """Get the shared HTTP session"""
+        return get_shared_session()
     
     async def close(self):
-        """Close HTTP session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        """Nothing to release; the shared session is closed on shutdown"""
     
     async def get_protocols(self) -> Optional[List[Dict]]:
         """Get all DeFi protocols"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/protocols"
             
-            async with session.get(url) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    log.warning(f"DeFi Llama API error: {response.status}")
-                    return None
+            status, data = await cached_get_json(url, ttl=600)
+            if status == 200:
+                return data
+            else:
+                log.warning(f"DeFi Llama API error: {status}")
+                return None
         except Exception as e:
             log.error(f"Error fetching protocols from DeFi Llama: {e}")
             return None
@@ -44,12 +37,11 @@ class DeFiLlamaClient:
     async def get_protocol(self, protocol_slug: str) -> Optional[Dict]:
         """Get specific protocol data"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/protocol/{protocol_slug}"
             
-            async with session.get(url) as response:
+            async with rate_limited_get(url) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await read_json(response)
                 else:
                     log.warning(f"DeFi Llama API error: {response.status}")
                     return None
@@ -60,12 +52,11 @@ class DeFiLlamaClient:
     async def get_tvl(self) -> Optional[Dict]:
         """Get total value locked across all chains"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/charts"
             
-            async with session.get(url) as response:
+            async with rate_limited_get(url) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await read_json(response)
                 else:
                     log.warning(f"DeFi Llama API error: {response.status}")
                     return None
@@ -76,12 +67,11 @@ class DeFiLlamaClient:
     async def get_chain_tvl(self, chain: str) -> Optional[Dict]:
         """Get TVL for a specific chain"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/charts/{chain}"
             
-            async with session.get(url) as response:
+            async with rate_limited_get(url) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await read_json(response)
                 else:
                     log.warning(f"DeFi Llama API error: {response.status}")
                     return None
@@ -92,13 +82,12 @@ class DeFiLlamaClient:
     async def get_stablecoins(self) -> Optional[Dict]:
         """Get stablecoin data"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/stablecoins"
             params = {'includePrices': 'true'}
             
-            async with session.get(url, params=params) as response:
+            async with rate_limited_get(url, params=params) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await read_json(response)
                 else:
                     log.warning(f"DeFi Llama API error: {response.status}")
                     return None
@@ -109,12 +98,11 @@ class DeFiLlamaClient:
     async def get_yields(self) -> Optional[List[Dict]]:
         """Get yield data for various pools"""
         try:
-            session = await self._get_session()
             url = "https://yields.llama.fi/pools"
             
-            async with session.get(url) as response:
+            async with rate_limited_get(url) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = await read_json(response)
                     return data.get('data', [])
                 else:
                     log.warning(f"DeFi Llama yields API error: {response.status}")
@@ -1,8 +1,10 @@
 """
 DEX Screener API integration for DEX trading data
 """
+import heapq
 import aiohttp
 from typing import Optional, Dict, List
+from app.data.sources._http import get_shared_session, cached_get_json, rate_limited_get, read_json
 from app.utils.logger import log
 
 
@@ -11,30 +13,22 @@ class DexScreenerClient:
     
     BASE_URL = "https://api.dexscreener.com/latest"
     
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
-    
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create HTTP session"""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
-        return self.session
+        """Get the shared HTTP session"""
+        return get_shared_session()
     
     async def close(self):
-        """Close HTTP session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        """Nothing to release; the shared session is closed on shutdown"""
     
     async def search_pairs(self, query: str) -> Optional[Dict]:
         """Search for trading pairs"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/dex/search"
             params = {'q': query}
             
-            async with session.get(url, params=params) as response:
+            async with rate_limited_get(url, params=params) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await read_json(response)
                 else:
                     log.warning(f"DEX Screener API error: {response.status}")
                     return None
@@ -45,12 +39,11 @@ class DexScreenerClient:
     async def get_pair_by_address(self, chain: str, pair_address: str) -> Optional[Dict]:
         """Get pair data by address"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/dex/pairs/{chain}/{pair_address}"
             
-            async with session.get(url) as response:
+            async with rate_limited_get(url) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await read_json(response)
                 else:
                     log.warning(f"DEX Screener API error: {response.status}")
                     return None
@@ -61,12 +54,11 @@ class DexScreenerClient:
     async def get_token_pairs(self, token_address: str) -> Optional[Dict]:
         """Get all pairs for a token address"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/dex/tokens/{token_address}"
             
-            async with session.get(url) as response:
+            async with rate_limited_get(url) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await read_json(response)
                 else:
                     log.warning(f"DEX Screener API error: {response.status}")
                     return None
@@ -77,15 +69,14 @@ class DexScreenerClient:
     async def get_latest_pairs(self) -> Optional[Dict]:
         """Get latest token pairs"""
         try:
-            session = await self._get_session()
             url = f"{self.BASE_URL}/dex/pairs/latest"
             
-            async with session.get(url) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    log.warning(f"DEX Screener API error: {response.status}")
-                    return None
+            status, data = await cached_get_json(url, ttl=30)
+            if status == 200:
+                return data
+            else:
+                log.warning(f"DEX Screener API error: {status}")
+                return None
         except Exception as e:
             log.error(f"Error fetching latest pairs from DEX Screener: {e}")
             return None
@@ -102,10 +93,9 @@ class DexScreenerClient:
                 if chain:
                     pairs = [p for p in pairs if p.get('chainId') == chain]
                 
-                # Sort by volume or liquidity
-                pairs.sort(key=lambda x: x.get('volume', {}).get('h24', 0), reverse=True)
-                
-                return pairs[:50]  # Top 50
+                # Top 50 by volume; a partial selection instead of sorting every
+                # pair (and the cached response list is left untouched)
+                return heapq.nlargest(50, pairs, key=lambda x: x.get('volume', {}).get('h24', 0))
             
             return []
         except Exception as e:
@@ -4,6 +4,7 @@ News aggregation and sentiment analysis from crypto news sources
 import aiohttp
 from typing import Optional, Dict, List
 from datetime import datetime, timedelta
+from app.data.sources._http import get_shared_session, cached_get_json
 from app.utils.logger import log
 from app.config import get_settings
 
@@ -18,18 +19,13 @@ class NewsAggregator:
     
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or getattr(settings, 'cryptopanic_api_key', 'free')
-        self.session: Optional[aiohttp.ClientSession] = None
     
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create HTTP session"""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
-        return self.session
+        """Get the shared HTTP session"""
+        return get_shared_session()
     
     async def close(self):
-        """Close HTTP session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        """Nothing to release; the shared session is closed on shutdown"""
     
     async def get_news(
         self,
@@ -49,8 +45,6 @@ class NewsAggregator:
             List of news items with sentiment
         """
         try:
-            session = await self._get_session()
-            
             params = {
                 'auth_token': self.api_key if self.api_key != 'free' else None,
                 'public': 'true' if self.api_key == 'free' else None,
@@ -81,23 +75,23 @@ class NewsAggregator:
             # Remove None values
             params = {k: v for k, v in params.items() if v is not None}
             
-            async with session.get(self.CRYPTOPANIC_URL, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
+            # The free tier allows very few calls per day, so a feed is reused for
+            # 5 minutes (limit only slices it and is not part of the request)
+            status, data = await cached_get_json(self.CRYPTOPANIC_URL, ttl=300, params=params)
+            if status == 200:
+                if 'results' in data:
+                    news_items = []
+                    for item in data['results'][:limit]:
+                        news_items.append(self._parse_news_item(item))
                     
-                    if 'results' in data:
-                        news_items = []
-                        for item in data['results'][:limit]:
-                            news_items.append(self._parse_news_item(item))
-                        
-                        log.info(f"Fetched {len(news_items)} news items for {symbol or 'all'}")
-                        return news_items
-                    else:
-                        log.warning("No results in CryptoPanic response")
-                        return []
+                    log.info(f"Fetched {len(news_items)} news items for {symbol or 'all'}")
+                    return news_items
                 else:
-                    log.warning(f"CryptoPanic API error: {response.status}")
+                    log.warning("No results in CryptoPanic response")
                     return []
+            else:
+                log.warning(f"CryptoPanic API error: {status}")
+                return []
                     
         except Exception as e:
             log.error(f"Error fetching news: {e}")
@@ -2,6 +2,7 @@
 Main FastAPI application
 """
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
@@ -10,6 +11,8 @@ from app.utils.logger import log
 from app.models.database import init_db
 from app.core.event_bus import get_event_bus
 from app.core.trading_bot import get_bot
+from app.core.metrics import render_metrics
+from app.data.sources._http import close_shared_session
 from app.api.routes import trading, strategies, portfolio, analytics
 from app.api import websocket
 
@@ -49,6 +52,9 @@ async def lifespan(app: FastAPI):
     # Stop event bus
     await event_bus.stop()
     log.info("Event bus stopped")
+    
+    # Release pooled connections of the data source clients
+    await close_shared_session()
 
 
 # Create FastAPI app
@@ -97,3 +103,8 @@ async def health():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return render_metrics()
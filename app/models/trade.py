@@ -2,13 +2,17 @@
 Trade model for recording executed trades
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, JSON, Index
 from app.models.database import Base
 
 
 class Trade(Base):
     """Trade execution record"""
     __tablename__ = "trades"
+    __table_args__ = (
+        # Serves the realized P&L aggregates in PortfolioManager
+        Index("ix_trades_status_closed_at", "status", "closed_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -46,7 +50,7 @@ class Trade(Base):
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     executed_at = Column(DateTime)
-    closed_at = Column(DateTime)
+    closed_at = Column(DateTime, index=True)
     
     # Additional metadata
     meta = Column(JSON, default={})
@@ -58,6 +58,20 @@ class BaseStrategy(ABC):
         """
         pass
     
+    def analyze_sync(self, data: pd.DataFrame) -> Signal:
+        """
+        Synchronous variant of analyze() for pure-CPU strategies
+        
+        Strategies that never await anything override this so callers such
+        as the backtester can skip coroutine overhead per bar.
+        """
+        raise NotImplementedError
+    
+    @property
+    def supports_sync(self) -> bool:
+        """Whether this strategy overrides analyze_sync()"""
+        return type(self).analyze_sync is not BaseStrategy.analyze_sync
+    
     @abstractmethod
     def get_entry_price(self, data: pd.DataFrame) -> Optional[float]:
         """Get suggested entry price"""
@@ -109,6 +123,35 @@ class BaseStrategy(ABC):
         Returns:
             (should_close, reason)
         """
+        exit_check = self._check_exit_levels(data, position_side, entry_price)
+        if exit_check is not None:
+            return exit_check
+        
+        # Check strategy-specific exit conditions
+        signal = await self.analyze(data)
+        return self._signal_exit(signal, position_side)
+    
+    def should_close_position_sync(
+        self,
+        data: pd.DataFrame,
+        position_side: str,
+        entry_price: float
+    ) -> tuple[bool, str]:
+        """Synchronous variant of should_close_position() using analyze_sync()"""
+        exit_check = self._check_exit_levels(data, position_side, entry_price)
+        if exit_check is not None:
+            return exit_check
+        
+        signal = self.analyze_sync(data)
+        return self._signal_exit(signal, position_side)
+    
+    def _check_exit_levels(
+        self,
+        data: pd.DataFrame,
+        position_side: str,
+        entry_price: float
+    ) -> Optional[tuple[bool, str]]:
+        """Check stop loss / take profit; None means defer to the signal"""
         # Get latest data
         if data.empty:
             return False, ""
@@ -131,8 +174,10 @@ class BaseStrategy(ABC):
             elif position_side == 'short' and current_price <= take_profit:
                 return True, "take_profit"
         
-        # Check strategy-specific exit conditions
-        signal = await self.analyze(data)
+        return None
+    
+    def _signal_exit(self, signal: Signal, position_side: str) -> tuple[bool, str]:
+        """Translate a strategy signal into an exit decision"""
         if position_side == 'long' and signal == Signal.SELL:
             return True, "signal"
         elif position_side == 'short' and signal == Signal.BUY:
@@ -33,6 +33,10 @@ class MomentumStrategy(BaseStrategy):
     
     async def analyze(self, data: pd.DataFrame) -> Signal:
         """Analyze data and generate signal"""
+        return self.analyze_sync(data)
+    
+    def analyze_sync(self, data: pd.DataFrame) -> Signal:
+        """Analyze data and generate signal (synchronous)"""
         if len(data) < self.params['min_data_points']:
             return Signal.HOLD
         
@@ -206,6 +206,9 @@ async def main():
         print(f"\nError running examples: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        from app.data.sources._http import close_shared_session
+        await close_shared_session()
 
 
 if __name__ == "__main__":
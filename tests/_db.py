@@ -0,0 +1,31 @@
+"""
+In-memory database for tests
+"""
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+
+
+@asynccontextmanager
+async def in_memory_db():
+    """Yield a session factory on a fresh in-memory SQLite database"""
+    # StaticPool so every session sees the same in-memory database
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    try:
+        yield async_sessionmaker(
+            engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autoflush=False,
+        )
+    finally:
+        await engine.dispose()
@@ -0,0 +1,467 @@
+"""
+Tests for error recovery utilities
+"""
+import asyncio
+import time
+import pytest
+
+from app.core import metrics
+from app.core.error_recovery import (
+    CircuitBreaker,
+    CircuitState,
+    ErrorRecord,
+    ErrorTracker,
+    RateLimiter,
+    RedisCircuitBreaker,
+    RedisRateLimiter,
+    RetryPolicy,
+    TokenBucket,
+)
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_allows_calls_within_limit():
+    """Test rate limiter does not block under the limit"""
+    limiter = RateLimiter(max_calls=5, time_window=60)
+
+    start = time.monotonic()
+    for _ in range(5):
+        await limiter.acquire()
+
+    assert time.monotonic() - start < 0.1
+    assert len(limiter.calls) == 5
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_waits_when_limit_reached():
+    """Test rate limiter waits for the oldest call to expire"""
+    limiter = RateLimiter(max_calls=2, time_window=0.2)
+
+    start = time.monotonic()
+    for _ in range(3):
+        await limiter.acquire()
+
+    assert time.monotonic() - start >= 0.2
+    assert len(limiter.calls) <= 2
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_throttles():
+    """Test token bucket serves a full burst immediately, then waits for refill"""
+    bucket = TokenBucket(capacity=5, rate=50)
+
+    start = time.monotonic()
+    for _ in range(5):
+        await bucket.acquire()
+    assert time.monotonic() - start < 0.05
+
+    await asyncio.gather(*(bucket.acquire() for _ in range(5)))
+    assert time.monotonic() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_charges_cost():
+    """Test heavier calls consume more tokens"""
+    bucket = TokenBucket(capacity=10, rate=1)
+
+    await bucket.acquire(cost=4)
+
+    assert 5.9 <= bucket.tokens <= 6.1
+
+
+def test_error_tracker_counts_within_window():
+    """Test error tracker counts and expires errors"""
+    tracker = ErrorTracker(window_size=3600)
+
+    tracker.record_error("timeout", "first")
+    tracker.record_error("timeout", "second")
+    tracker.record_error("auth")
+
+    assert tracker.get_error_count("timeout") == 2
+    assert tracker.get_all_errors() == {"timeout": 2, "auth": 1}
+    assert tracker.get_error_count("unknown") == 0
+
+    # Age the entries past the window
+    tracker.errors["timeout"][0] = ErrorRecord(time.monotonic() - 7200, "first")
+    assert tracker.get_error_count("timeout") == 1
+
+    # Types with nothing left in the window are dropped
+    tracker.errors["auth"][0] = ErrorRecord(time.monotonic() - 7200, "")
+    assert tracker.get_all_errors() == {"timeout": 1}
+    assert "auth" not in tracker.errors
+
+    tracker.clear()
+    assert tracker.get_all_errors() == {}
+
+
+def test_error_tracker_rate_in_last():
+    """Test failure ratio over a recent window"""
+    tracker = ErrorTracker(window_size=3600)
+
+    for _ in range(4):
+        tracker.record_attempt("strategy")
+    tracker.record_error("strategy")
+    assert tracker.rate_in_last("strategy", 60) == 0.25
+
+    # Too few attempts to judge
+    assert tracker.rate_in_last("strategy", 60, min_attempts=5) == 0.0
+
+    # Attempts and errors outside the window are ignored
+    tracker.errors["strategy"][0] = ErrorRecord(time.monotonic() - 120, "")
+    assert tracker.rate_in_last("strategy", 60) == 0.0
+    assert tracker.rate_in_last("unknown", 60) == 0.0
+
+
+def test_error_tracker_overflow_types_are_approximated():
+    """Test error types beyond max_types fall back to the sketch"""
+    tracker = ErrorTracker(window_size=3600, max_types=2)
+
+    tracker.record_error("a")
+    tracker.record_error("b")
+    for _ in range(3):
+        tracker.record_error("c")
+
+    assert set(tracker.errors) == {"a", "b"}
+    assert tracker.get_error_count("c") >= 3
+    assert tracker.get_error_count("never_seen") == 0
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_and_recovers():
+    """Test circuit breaker trips after threshold and recovers"""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+
+    async def fail():
+        raise ValueError("boom")
+
+    async def succeed():
+        return "ok"
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await breaker.call(fail)
+
+    assert breaker.state == CircuitState.OPEN
+
+    with pytest.raises(Exception, match="OPEN"):
+        await breaker.call(succeed)
+
+    # Pretend the recovery timeout has elapsed
+    breaker.last_failure_time = time.monotonic() - 61
+    assert await breaker.call(succeed) == "ok"
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.failure_count == 0
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_allows_single_half_open_probe():
+    """Test only one caller probes while the breaker is HALF_OPEN"""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    release = asyncio.Event()
+
+    async def fail():
+        raise ValueError("boom")
+
+    async def slow_probe():
+        await release.wait()
+        return "ok"
+
+    with pytest.raises(ValueError):
+        await breaker.call(fail)
+    breaker.last_failure_time = time.monotonic() - 61
+
+    probe = asyncio.create_task(breaker.call(slow_probe))
+    await asyncio.sleep(0)
+    assert breaker.state == CircuitState.HALF_OPEN
+
+    with pytest.raises(Exception, match="probing"):
+        await breaker.call(slow_probe)
+
+    release.set()
+    assert await probe == "ok"
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_reopens_on_failed_probe():
+    """Test a failed HALF_OPEN probe re-opens the breaker"""
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+    breaker.state = CircuitState.OPEN
+    breaker.last_failure_time = time.monotonic() - 61
+
+    async def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await breaker.call(fail)
+
+    assert breaker.state == CircuitState.OPEN
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_records_metrics():
+    """Test breaker transitions and failures are exported as metrics"""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60, name="test_metrics")
+
+    async def fail():
+        raise ValueError("boom")
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await breaker.call(fail)
+
+    assert metrics.circuit_state.labels("test_metrics").value == CircuitState.OPEN
+    assert metrics.circuit_failures.labels("test_metrics").value == 2
+    assert metrics.circuit_transitions.labels("test_metrics", "open").value == 1
+    assert 'cb_state{name="test_metrics"} 1' in metrics.render_metrics()
+
+
+def test_error_tracker_overflow_types_share_metric_label():
+    """Test error types past max_types are counted under the shared label"""
+    tracker = ErrorTracker(window_size=3600, max_types=1)
+    other = metrics.errors_total.labels(metrics.OVERFLOW_LABEL)
+    before = other.value
+
+    tracker.record_error("metric_exact")
+    tracker.record_error("metric_overflow_1")
+    tracker.record_error("metric_overflow_2")
+
+    assert metrics.errors_total.labels("metric_exact").value == 1
+    assert other.value == before + 2
+    assert ("metric_overflow_1",) not in metrics.errors_total._children
+
+
+def test_metric_label_sets_are_capped_and_escaped():
+    """Test label sets past max_children collapse and label values are escaped"""
+    counter = metrics.Counter("test_capped_total", "Capped test counter", ("kind",), max_children=2)
+    try:
+        counter.labels('quote " backslash \\ newline \n').inc()
+        counter.labels("second").inc()
+        counter.labels("third").inc()
+        counter.labels("fourth").inc()
+
+        assert counter.labels("third") is counter.labels(metrics.OVERFLOW_LABEL)
+        lines = counter.render()
+        assert 'test_capped_total{kind="quote \\" backslash \\\\ newline \\n"} 1.0' in lines
+        assert 'test_capped_total{kind="other"} 2.0' in lines
+        assert len(lines) == 5
+    finally:
+        metrics.REGISTRY.remove(counter)
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_retries_until_success():
+    """Test retry policy retries failed calls"""
+    policy = RetryPolicy(max_attempts=3, initial_delay=0.01)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ValueError("transient")
+        return "ok"
+
+    assert await policy.execute(flaky) == "ok"
+    assert len(attempts) == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_jitter_bounds_delay(monkeypatch):
+    """Test full jitter keeps each delay within the backoff cap"""
+    policy = RetryPolicy(max_attempts=4, initial_delay=1.0, max_delay=3.0)
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+
+    async def always_fail():
+        raise ValueError("down")
+
+    with pytest.raises(ValueError):
+        await policy.execute(always_fail)
+
+    assert len(delays) == 3
+    for delay, cap in zip(delays, [1.0, 2.0, 3.0]):
+        assert 0 <= delay <= cap
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_raises_non_retryable_immediately():
+    """Test non-retryable errors are not retried"""
+    policy = RetryPolicy(
+        max_attempts=3,
+        initial_delay=0.01,
+        non_retryable=(PermissionError,)
+    )
+    attempts = []
+
+    async def denied():
+        attempts.append(1)
+        raise PermissionError("bad key")
+
+    with pytest.raises(PermissionError):
+        await policy.execute(denied)
+
+    assert len(attempts) == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_only_retries_listed_errors():
+    """Test errors outside errors_to_retry propagate without retrying"""
+    policy = RetryPolicy(
+        max_attempts=3,
+        initial_delay=0.01,
+        errors_to_retry=(ConnectionError, asyncio.TimeoutError)
+    )
+    attempts = []
+
+    async def rejected():
+        attempts.append(1)
+        raise ValueError("insufficient funds")
+
+    with pytest.raises(ValueError):
+        await policy.execute(rejected)
+
+    assert len(attempts) == 1
+
+
+def fake_redis():
+    """In-memory Redis client that also runs the Lua scripts"""
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+class ProbeFailed(Exception):
+    pass
+
+
+async def fail(*args):
+    raise ProbeFailed()
+
+
+async def succeed(*args):
+    return "ok"
+
+
+@pytest.mark.asyncio
+async def test_redis_rate_limiter_shares_limit_across_instances():
+    """Test limiters on the same key draw from one budget"""
+    redis = fake_redis()
+    first = RedisRateLimiter(redis, "limit:test", max_calls=3, time_window=60)
+    second = RedisRateLimiter(redis, "limit:test", max_calls=3, time_window=60)
+
+    await asyncio.wait_for(first.acquire(), timeout=0.5)
+    await asyncio.wait_for(second.acquire(), timeout=0.5)
+    await asyncio.wait_for(first.acquire(), timeout=0.5)
+
+    # The shared budget is spent, so the next call has to wait
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(second.acquire(), timeout=0.2)
+
+    await first.reset()
+    assert await redis.get("limit:test") is None
+    await asyncio.wait_for(second.acquire(), timeout=0.5)
+
+
+@pytest.mark.asyncio
+async def test_redis_circuit_breaker_opens_for_every_instance():
+    """Test failures recorded by one process open the circuit for others"""
+    redis = fake_redis()
+    first = RedisCircuitBreaker(redis, "cb:test", failure_threshold=2, recovery_timeout=60, local_ttl=0)
+    second = RedisCircuitBreaker(redis, "cb:test", failure_threshold=2, recovery_timeout=60, local_ttl=0)
+
+    for _ in range(2):
+        with pytest.raises(ProbeFailed):
+            await first.call(fail)
+        await asyncio.gather(*first._pending)
+
+    with pytest.raises(Exception, match="OPEN"):
+        await second.call(succeed)
+
+    await second.reset_shared()
+    assert await first.call(succeed) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_redis_circuit_breaker_probe_keeps_newer_lock():
+    """Test a probe that outlived its lock does not release another probe's lock"""
+    redis = fake_redis()
+    first = RedisCircuitBreaker(redis, "cb:probe", failure_threshold=1, recovery_timeout=1, local_ttl=0)
+    second = RedisCircuitBreaker(redis, "cb:probe", failure_threshold=1, recovery_timeout=1, local_ttl=0)
+
+    # Opened long enough ago that a probe is due
+    await redis.hset("cb:probe", mapping={"failures": 1, "opened_at": time.time() - 5})
+
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_probe():
+        started.set()
+        await release.wait()
+        return "ok"
+
+    probe = asyncio.create_task(first.call(slow_probe))
+    await started.wait()
+
+    # While the first probe holds the lock nobody else may probe
+    with pytest.raises(Exception, match="probing"):
+        await second.call(succeed)
+
+    # The lock expires under the slow probe and another process takes it
+    await redis.set("cb:probe:probe", "other-token")
+
+    release.set()
+    assert await probe == "ok"
+    assert await redis.get("cb:probe:probe") == "other-token"
+
+
+@pytest.mark.asyncio
+async def test_redis_circuit_breaker_rejects_local_callers_while_probing():
+    """Test only the probe reaches the service while the circuit is HALF_OPEN"""
+    redis = fake_redis()
+    breaker = RedisCircuitBreaker(redis, "cb:local", failure_threshold=1, recovery_timeout=1, local_ttl=60)
+    await redis.hset("cb:local", mapping={"failures": 1, "opened_at": time.time() - 5})
+
+    release = asyncio.Event()
+    service_calls = 0
+
+    async def slow_service():
+        nonlocal service_calls
+        service_calls += 1
+        await release.wait()
+        return "ok"
+
+    probe = asyncio.create_task(breaker.call(slow_service))
+    await asyncio.sleep(0.01)
+
+    callers = [asyncio.create_task(breaker.call(slow_service)) for _ in range(6)]
+    await asyncio.sleep(0.01)
+    assert service_calls == 1
+
+    release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+    assert all("probing" in str(result) for result in results)
+    assert await probe == "ok"
+    assert breaker.state == CircuitState.CLOSED
+    assert await redis.exists("cb:local") == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_circuit_breaker_failed_probe_reopens_before_next_call():
+    """Test a failed probe re-opens the circuit before any other caller runs"""
+    redis = fake_redis()
+    breaker = RedisCircuitBreaker(redis, "cb:reopen", failure_threshold=1, recovery_timeout=60, local_ttl=60)
+    await redis.hset("cb:reopen", mapping={"failures": 1, "opened_at": time.time() - 120})
+
+    with pytest.raises(ProbeFailed):
+        await breaker.call(fail)
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker._pending == set()
+    with pytest.raises(Exception, match="OPEN"):
+        await breaker.call(succeed)
+
+    # The shared state was not cleared by a caller slipping through
+    assert float(await redis.hget("cb:reopen", "opened_at")) > time.time() - 5
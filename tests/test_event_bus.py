@@ -0,0 +1,130 @@
+"""
+Tests for the event bus
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+import pytest
+
+from app.core.event_bus import Event, EventBus, EventType
+
+
+@pytest.mark.asyncio
+async def test_event_bus_delivers_to_subscribers():
+    """Test sync and async subscribers receive published events"""
+    bus = EventBus()
+    received = []
+
+    async def async_handler(event):
+        received.append(("async", event.data["value"]))
+
+    def sync_handler(event):
+        received.append(("sync", event.data["value"]))
+
+    bus.subscribe(EventType.ORDER_FILLED, async_handler)
+    bus.subscribe(EventType.ORDER_FILLED, sync_handler)
+
+    await bus.start()
+    await bus.emit(EventType.ORDER_FILLED, {"value": 1})
+    await bus.stop()
+
+    assert sorted(received) == [("async", 1), ("sync", 1)]
+
+
+@pytest.mark.asyncio
+async def test_event_bus_stop_is_prompt():
+    """Test stopping an idle bus does not wait for a poll timeout"""
+    bus = EventBus()
+    await bus.start()
+
+    await asyncio.wait_for(bus.stop(), timeout=0.5)
+
+    assert not bus.running
+
+
+@pytest.mark.asyncio
+async def test_event_bus_runs_callbacks_concurrently():
+    """Test a slow subscriber does not delay the others"""
+    bus = EventBus()
+    fast_done = asyncio.Event()
+    order = []
+
+    async def slow_handler(event):
+        await asyncio.wait_for(fast_done.wait(), timeout=1.0)
+        order.append("slow")
+
+    async def fast_handler(event):
+        order.append("fast")
+        fast_done.set()
+
+    async def failing_handler(event):
+        raise RuntimeError("subscriber failure")
+
+    bus.subscribe(EventType.MARKET_DATA_UPDATED, slow_handler)
+    bus.subscribe(EventType.MARKET_DATA_UPDATED, failing_handler)
+    bus.subscribe(EventType.MARKET_DATA_UPDATED, fast_handler)
+
+    await bus.start()
+    await bus.emit(EventType.MARKET_DATA_UPDATED, {})
+    await bus.stop()
+
+    assert order == ["fast", "slow"]
+
+
+@pytest.mark.asyncio
+async def test_event_bus_isolates_event_types():
+    """Test a blocked event type does not delay other event types"""
+    bus = EventBus()
+    unblock = asyncio.Event()
+    filled = asyncio.Event()
+
+    async def blocked_handler(event):
+        await unblock.wait()
+
+    async def filled_handler(event):
+        filled.set()
+
+    bus.subscribe(EventType.MARKET_DATA_UPDATED, blocked_handler)
+    await bus.start()
+    # Subscribing after start spawns the worker lazily
+    bus.subscribe(EventType.ORDER_FILLED, filled_handler)
+
+    await bus.emit(EventType.MARKET_DATA_UPDATED, {})
+    await bus.emit(EventType.ORDER_FILLED, {})
+
+    await asyncio.wait_for(filled.wait(), timeout=0.5)
+
+    unblock.set()
+    await bus.stop()
+    assert bus.get_queue_size() == 0
+
+
+@pytest.mark.asyncio
+async def test_event_bus_flush_waits_for_delivery():
+    """Test flush returns once queued events are handled and full queues apply backpressure"""
+    bus = EventBus(max_queue_size=2)
+    received = []
+
+    async def handler(event):
+        await asyncio.sleep(0.01)
+        received.append(event.data["value"])
+
+    bus.subscribe(EventType.ORDER_FILLED, handler)
+    await bus.start()
+    for value in range(5):
+        await bus.emit(EventType.ORDER_FILLED, {"value": value})
+
+    await asyncio.wait_for(bus.flush(), timeout=1.0)
+    assert received == [0, 1, 2, 3, 4]
+
+    await bus.stop()
+
+
+def test_event_timestamp_defaults_to_now():
+    """Test events are stamped with epoch nanoseconds on creation"""
+    before = time.time_ns()
+    event = Event(event_type=EventType.BOT_STARTED, data={})
+
+    assert before <= event.timestamp <= time.time_ns()
+    assert abs(event.created_at - datetime.utcnow()) < timedelta(seconds=5)
+    assert not hasattr(event, "__dict__")
@@ -0,0 +1,20 @@
+"""
+Tests for exchange manager helpers
+"""
+import pytest
+from app.core.exchange_manager import ExchangeManager
+
+
+def test_fee_table_keeps_zero_fees():
+    """Test a listed 0.0 fee is used and only a missing fee falls back to 0.1%"""
+    manager = ExchangeManager("binance")
+    manager.markets = {
+        'FREE/USDT': {'taker': 0.0, 'maker': 0.0},
+        'MISSING/USDT': {'taker': None},
+    }
+    manager._build_market_tables()
+    
+    assert manager.calculate_fee('FREE/USDT', 1.0, 100.0, 'market') == 0.0
+    assert manager.calculate_fee('FREE/USDT', 1.0, 100.0, 'limit') == 0.0
+    assert manager.calculate_fee('MISSING/USDT', 1.0, 100.0, 'market') == pytest.approx(0.1)
+    assert manager.calculate_fee('MISSING/USDT', 1.0, 100.0, 'limit') == pytest.approx(0.1)
@@ -0,0 +1,154 @@
+"""
+Tests for the shared HTTP helpers of the data source clients
+"""
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import app.data.sources._http as http
+
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+@pytest.fixture(autouse=True)
+def fresh_http_state(monkeypatch):
+    """Give each test its own response cache and rate limiters"""
+    monkeypatch.setattr(http, "_response_cache", OrderedDict())
+    monkeypatch.setattr(http, "_limiters", {})
+
+
+@asynccontextmanager
+async def serve(*routes):
+    """Run an aiohttp.web app on a local port; the shared session is closed afterwards"""
+    app = web.Application()
+    app.add_routes(routes)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        yield server
+    finally:
+        await http.close_shared_session()
+        await server.close()
+
+
+class Endpoint:
+    """Handler that records the requests it served"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        self.requests.append(request.headers.copy())
+        return self.respond(request)
+
+
+async def test_cached_get_json_serves_fresh_response_from_memory():
+    """Test a second call within ttl does not reach the server"""
+    endpoint = Endpoint(lambda request: web.json_response({"price": 1}))
+    async with serve(web.get("/data", endpoint.handle)) as server:
+        url = str(server.make_url("/data"))
+
+        assert await http.cached_get_json(url, ttl=60) == (200, {"price": 1})
+        assert await http.cached_get_json(url, ttl=60) == (200, {"price": 1})
+
+    assert len(endpoint.requests) == 1
+
+
+async def test_cached_get_json_304_keeps_payload_and_validators():
+    """Test revalidation reuses the payload and keeps ETag and Last-Modified"""
+    def respond(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)  # no validators repeated
+        return web.json_response(
+            {"price": 1}, headers={"ETag": '"v1"', "Last-Modified": LAST_MODIFIED}
+        )
+
+    endpoint = Endpoint(respond)
+    async with serve(web.get("/data", endpoint.handle)) as server:
+        url = str(server.make_url("/data"))
+
+        first = await http.cached_get_json(url, ttl=0)
+        second = await http.cached_get_json(url, ttl=0)
+        third = await http.cached_get_json(url, ttl=0)
+
+    assert first == second == third == (200, {"price": 1})
+    assert second[1] is first[1]
+    assert "If-None-Match" not in endpoint.requests[0]
+    for headers in endpoint.requests[1:]:
+        assert headers["If-None-Match"] == '"v1"'
+        assert headers["If-Modified-Since"] == LAST_MODIFIED
+    [(_, etag, modified, _)] = http._response_cache.values()
+    assert (etag, modified) == ('"v1"', LAST_MODIFIED)
+
+
+async def test_cached_get_json_revalidates_with_date_without_last_modified():
+    """Test the response Date is sent as If-Modified-Since when Last-Modified is missing"""
+    def respond(request):
+        if "If-Modified-Since" in request.headers:
+            return web.Response(status=304)
+        return web.json_response({"blocks": 1})
+
+    endpoint = Endpoint(respond)
+    async with serve(web.get("/stats", endpoint.handle)) as server:
+        url = str(server.make_url("/stats"))
+
+        await http.cached_get_json(url, ttl=0)
+        [(_, _, date, _)] = http._response_cache.values()
+        assert date
+
+        assert await http.cached_get_json(url, ttl=0) == (200, {"blocks": 1})
+
+    assert endpoint.requests[1]["If-Modified-Since"] == date
+
+
+async def test_cached_get_json_evicts_least_recently_used(monkeypatch):
+    """Test the cache drops the least recently used entry past RESPONSE_CACHE_SIZE"""
+    monkeypatch.setattr(http, "RESPONSE_CACHE_SIZE", 2)
+    endpoints = {
+        name: Endpoint(lambda request, name=name: web.json_response({"name": name}))
+        for name in ("a", "b", "c")
+    }
+    async with serve(*(web.get(f"/{name}", endpoint.handle) for name, endpoint in endpoints.items())) as server:
+        url = {name: str(server.make_url(f"/{name}")) for name in endpoints}
+
+        await http.cached_get_json(url["a"], ttl=60)
+        await http.cached_get_json(url["b"], ttl=60)
+        await http.cached_get_json(url["a"], ttl=60)  # a is now the most recent
+        await http.cached_get_json(url["c"], ttl=60)  # evicts b
+
+        assert [key[0] for key in http._response_cache] == [url["a"], url["c"]]
+
+        await http.cached_get_json(url["a"], ttl=60)
+        await http.cached_get_json(url["b"], ttl=60)
+
+    assert len(endpoints["a"].requests) == 1
+    assert len(endpoints["b"].requests) == 2
+
+
+async def test_rate_limited_get_retries_after_429(monkeypatch):
+    """Test a 429 is retried after the server's Retry-After"""
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(http, "asyncio", SimpleNamespace(sleep=sleep))
+
+    def respond(request):
+        if len(endpoint.requests) == 1:
+            return web.Response(status=429, headers={"Retry-After": "2"})
+        return web.json_response({"ok": True})
+
+    endpoint = Endpoint(respond)
+    async with serve(web.get("/limited", endpoint.handle)) as server:
+        async with http.rate_limited_get(str(server.make_url("/limited"))) as response:
+            assert response.status == 200
+            assert await http.read_json(response) == {"ok": True}
+
+    assert len(endpoint.requests) == 2
+    assert delays == [2.0]
@@ -5,7 +5,9 @@ import pytest
 import pandas as pd
 import numpy as np
 
-from app.data.indicators import TechnicalIndicators
+import app.data.indicators as indicators
+from app.data.indicators import TechnicalIndicators, IncrementalIndicators
+from app.data.indicators_numba import rsi_nb, macd_nb, atr_nb, adx_nb, obv_nb
 
 
 @pytest.fixture
@@ -131,3 +133,66 @@ def test_add_all_indicators(sample_price_data):
     # Check that data isn't empty
     assert len(df) > 0
 
+
+def test_incremental_indicators_match_full_compute(sample_price_data):
+    """Test sliding the window by one candle gives the same latest rows"""
+    incremental = IncrementalIndicators()
+    incremental.compute(sample_price_data.iloc[:80])
+    
+    # Next candle: window slides and the previously forming candle closes
+    df = incremental.compute(sample_price_data.iloc[1:81])
+    expected = TechnicalIndicators.add_all_indicators(sample_price_data.iloc[:81])
+    
+    assert list(df.columns) == list(expected.columns)
+    for column in ['sma_20', 'ema_12', 'rsi', 'macd', 'bb_upper', 'atr', 'stoch_k', 'adx']:
+        np.testing.assert_allclose(df[column].iloc[-2:], expected[column].iloc[-2:], rtol=1e-6)
+
+
+def test_incremental_indicators_catch_up_several_candles(sample_price_data, monkeypatch):
+    """Test several appended candles are computed without a full recompute"""
+    incremental = IncrementalIndicators()
+    incremental.compute(sample_price_data.iloc[:80])
+    expected = TechnicalIndicators.add_all_indicators(sample_price_data.iloc[:83])
+    
+    def full_compute(df):
+        raise AssertionError("full recompute")
+    monkeypatch.setattr(TechnicalIndicators, 'add_all_indicators', full_compute)
+    
+    df = incremental.compute(sample_price_data.iloc[3:83])
+    for column in ['sma_20', 'ema_12', 'rsi', 'macd', 'bb_upper', 'atr', 'stoch_k', 'adx']:
+        np.testing.assert_allclose(df[column].iloc[-4:], expected[column].iloc[-4:], rtol=1e-6)
+
+
+def test_numba_kernels_match_pandas_fallback(sample_price_data, monkeypatch):
+    """Test the numba kernels reproduce the pandas fallback implementations"""
+    monkeypatch.setattr(indicators, 'TALIB_AVAILABLE', False)
+    monkeypatch.setattr(indicators, 'NUMBA_AVAILABLE', False)
+    
+    high = sample_price_data['high']
+    low = sample_price_data['low']
+    close = sample_price_data['close']
+    volume = sample_price_data['volume']
+    h, l, c, v = (s.to_numpy(dtype=np.float64) for s in (high, low, close, volume))
+    
+    pairs = [
+        (rsi_nb(c, 14), TechnicalIndicators.calculate_rsi(close, 14)),
+        *zip(macd_nb(c, 12, 26, 9), TechnicalIndicators.calculate_macd(close)),
+        (atr_nb(h, l, c, 14), TechnicalIndicators.calculate_atr(high, low, close, 14)),
+        (adx_nb(h, l, c, 14), TechnicalIndicators.calculate_adx(high, low, close, 14)),
+        (obv_nb(c, v), TechnicalIndicators.calculate_obv(close, volume)),
+    ]
+    for kernel, expected in pairs:
+        np.testing.assert_allclose(kernel, expected.to_numpy(dtype=np.float64), equal_nan=True)
+
+
+def test_incremental_indicators_reuse_identical_frame(sample_price_data):
+    """Test an unchanged frame returns the previous result without recomputing"""
+    incremental = IncrementalIndicators()
+    first = incremental.compute(sample_price_data)
+    
+    assert incremental.compute(sample_price_data.copy()) is first
+    
+    # A revised forming candle is recomputed
+    revised = sample_price_data.copy()
+    revised.iloc[-1, revised.columns.get_loc('close')] += 1
+    assert incremental.compute(revised) is not first
@@ -0,0 +1,148 @@
+"""
+Tests for order execution
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from app.core.order_executor import OrderExecutor
+from app.core.portfolio_manager import PortfolioManager
+from app.models.position import Position
+from app.models.trade import Trade
+from tests._db import in_memory_db
+
+
+class FakeExchange:
+    """Just enough of ExchangeManager for paper orders"""
+    
+    exchange_name = "binance"
+    
+    def __init__(self, price: float):
+        self.price = price
+        self.ticker_calls = 0
+    
+    async def fetch_ticker_cached(self, symbol: str):
+        self.ticker_calls += 1
+        await asyncio.sleep(0)  # let concurrent callers interleave
+        return {'last': self.price}
+
+
+async def read_rows(session_factory, model):
+    """Load every row of model through a separate session"""
+    async with session_factory() as session:
+        result = await session.execute(select(model).order_by(model.id))
+        return result.scalars().all()
+
+
+async def test_paper_buy_and_sell_persist_trades_and_position():
+    """Test a buy writes its trade and position, and a sell closes both in one go"""
+    async with in_memory_db() as session_factory, session_factory() as db:
+        exchange = FakeExchange(100.0)
+        portfolio = PortfolioManager(db)
+        await portfolio.initialize(10000.0)
+        executor = OrderExecutor(exchange, portfolio, db)
+        
+        buy = await executor.execute_market_buy("BTC/USDT", 2.0, "test", stop_loss=90.0)
+        
+        [trade] = await read_rows(session_factory, Trade)
+        assert trade.id == buy.id
+        assert (trade.side, trade.status) == ('buy', 'open')
+        assert trade.cost == pytest.approx(200.0)
+        assert trade.fee == pytest.approx(0.2)
+        assert trade.fee_currency == 'USDT'
+        [position] = await read_rows(session_factory, Position)
+        assert position.is_open
+        assert position.entry_trade_id == buy.id
+        assert position.stop_loss == pytest.approx(90.0)
+        
+        exchange.price = 120.0
+        sell = await executor.execute_market_sell("BTC/USDT", 2.0, "test")
+        
+        assert sell.realized_pnl == pytest.approx(40.0)
+        trades = await read_rows(session_factory, Trade)
+        assert [t.side for t in trades] == ['buy', 'sell']
+        assert trades[1].realized_pnl == pytest.approx(40.0)
+        [position] = await read_rows(session_factory, Position)
+        assert not position.is_open
+        assert position.exit_trade_id == sell.id
+        assert position.current_price == pytest.approx(120.0)
+        assert await portfolio.get_position("binance", "BTC/USDT") is None
+
+
+async def test_concurrent_closes_sell_once():
+    """Test closes racing on one position, even from separate executors, place one sell"""
+    async with in_memory_db() as session_factory, session_factory() as db:
+        exchange = FakeExchange(100.0)
+        portfolio = PortfolioManager(db)
+        await portfolio.initialize(10000.0)
+        await OrderExecutor(exchange, portfolio, db).execute_market_buy("BTC/USDT", 1.0, "test")
+        position = await portfolio.get_position("binance", "BTC/USDT")
+        
+        exchange.price = 90.0
+        results = await asyncio.gather(
+            OrderExecutor(exchange, portfolio, db).close_position(position, "stop_loss"),
+            OrderExecutor(exchange, portfolio, db).close_position(position, "take_profit"),
+            OrderExecutor(exchange, portfolio, db).close_position(position, "manual")
+        )
+        
+        assert results[0] is not None
+        assert all(result is results[0] for result in results)
+        trades = await read_rows(session_factory, Trade)
+        assert [t.side for t in trades] == ['buy', 'sell']
+        assert trades[1].realized_pnl == pytest.approx(-10.0)
+        assert OrderExecutor._closing == {}
+
+
+def fail_next_commit(monkeypatch, db):
+    """Make the session's next commit raise, as a lost connection would"""
+    commit = db.commit
+    
+    async def failing_commit():
+        monkeypatch.setattr(db, "commit", commit)
+        raise RuntimeError("commit failed")
+    
+    monkeypatch.setattr(db, "commit", failing_commit)
+
+
+async def test_failed_buy_commit_leaves_no_phantom_position(monkeypatch):
+    """Test a rolled back buy is not tracked as an open position"""
+    async with in_memory_db() as session_factory, session_factory() as db:
+        portfolio = PortfolioManager(db)
+        await portfolio.initialize(10000.0)
+        executor = OrderExecutor(FakeExchange(100.0), portfolio, db)
+        
+        fail_next_commit(monkeypatch, db)
+        assert await executor.execute_market_buy("BTC/USDT", 1.0, "test") is None
+        
+        assert await portfolio.get_position("binance", "BTC/USDT") is None
+        assert await read_rows(session_factory, Position) == []
+        assert await read_rows(session_factory, Trade) == []
+
+
+async def test_failed_sell_commit_keeps_position_and_balance(monkeypatch):
+    """Test a rolled back sell leaves the position, balance and daily P&L as in the database"""
+    async with in_memory_db() as session_factory, session_factory() as db:
+        exchange = FakeExchange(100.0)
+        portfolio = PortfolioManager(db)
+        await portfolio.initialize(10000.0)
+        executor = OrderExecutor(exchange, portfolio, db)
+        await executor.execute_market_buy("BTC/USDT", 1.0, "test")
+        
+        exchange.price = 120.0
+        fail_next_commit(monkeypatch, db)
+        assert await executor.execute_market_sell("BTC/USDT", 1.0, "test") is None
+        
+        position = await portfolio.get_position("binance", "BTC/USDT")
+        assert position is not None and position.is_open
+        assert portfolio.current_balance == 10000.0
+        assert portfolio.risk_manager.daily_pnl == 0
+        [stored] = await read_rows(session_factory, Position)
+        assert stored.is_open
+        
+        # The resynced position can still be priced and closed
+        portfolio._apply_prices({"BTC/USDT": 120.0})
+        sell = await executor.execute_market_sell("BTC/USDT", 1.0, "test")
+        assert sell.realized_pnl == pytest.approx(20.0)
+        assert portfolio.current_balance == pytest.approx(10020.0)
+        assert await portfolio.get_position("binance", "BTC/USDT") is None
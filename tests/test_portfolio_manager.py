@@ -0,0 +1,172 @@
+"""
+Tests for portfolio management
+"""
+import pytest
+from sqlalchemy import select
+
+from app.core.portfolio_manager import PortfolioManager
+from app.models.position import Position
+from tests._db import in_memory_db
+
+
+async def read_position(session_factory, position_id: int) -> Position:
+    """Load a position through a separate session, i.e. what is in the database"""
+    async with session_factory() as session:
+        result = await session.execute(select(Position).where(Position.id == position_id))
+        return result.scalar_one()
+
+
+async def test_close_position_persists_exit_after_pending_price():
+    """Test closing writes the exit price even when a price update is still queued"""
+    async with in_memory_db() as session_factory, session_factory() as db:
+        portfolio = PortfolioManager(db)
+        await portfolio.initialize(10000.0)
+        position = await portfolio.open_position("binance", "BTC/USDT", "long", 1.0, 100.0, "test")
+        
+        # Applied in memory and queued, but not flushed yet
+        portfolio._apply_prices({"BTC/USDT": 130.0})
+        
+        realized = await portfolio.close_position(position, 140.0)
+        
+        assert realized == pytest.approx(40.0)
+        stored = await read_position(session_factory, position.id)
+        assert not stored.is_open
+        assert stored.current_price == pytest.approx(140.0)
+        assert stored.unrealized_pnl == pytest.approx(40.0)
+
+
+async def test_close_position_at_last_applied_price():
+    """Test closing at the price just applied still persists it"""
+    async with in_memory_db() as session_factory, session_factory() as db:
+        portfolio = PortfolioManager(db)
+        await portfolio.initialize(10000.0)
+        position = await portfolio.open_position("binance", "BTC/USDT", "long", 1.0, 100.0, "test")
+        
+        portfolio._apply_prices({"BTC/USDT": 130.0})
+        await portfolio.close_position(position, 130.0)
+        
+        stored = await read_position(session_factory, position.id)
+        assert not stored.is_open
+        assert stored.current_price == pytest.approx(130.0)
+        assert stored.unrealized_pnl == pytest.approx(30.0)
+
+
+async def test_update_position_prices_persists_every_update():
+    """Test back-to-back managers each write their price updates"""
+    async with in_memory_db() as session_factory:
+        async with session_factory() as db:
+            portfolio = PortfolioManager(db)
+            await portfolio.initialize(10000.0)
+            position = await portfolio.open_position("binance", "BTC/USDT", "long", 1.0, 100.0, "test")
+        
+        for price in (110.0, 120.0):
+            async with session_factory() as db:
+                portfolio = PortfolioManager(db)
+                await portfolio.load_open_positions()
+                await portfolio.update_position_prices({"BTC/USDT": price})
+        
+        stored = await read_position(session_factory, position.id)
+        assert stored.current_price == pytest.approx(120.0)
+        assert stored.unrealized_pnl == pytest.approx(20.0)
+
+
+async def open_positions(portfolio: PortfolioManager):
+    """Open a long and a short position with stops and targets"""
+    long = await portfolio.open_position(
+        "binance", "BTC/USDT", "long", 1.0, 100.0, "test", stop_loss=90.0, take_profit=130.0
+    )
+    short = await portfolio.open_position(
+        "binance", "ETH/USDT", "short", 2.0, 50.0, "test", stop_loss=55.0, take_profit=40.0
+    )
+    return long, short
+
+
+async def test_apply_prices_long_and_short():
+    """Test vectorized repricing matches Position.update_pnl for both sides"""
+    async with in_memory_db() as session_factory, session_factory() as db:
+        portfolio = PortfolioManager(db)
+        await portfolio.initialize(10000.0)
+        long, short = await open_positions(portfolio)
+        
+        triggered = portfolio._apply_prices({"BTC/USDT": 110.0, "ETH/USDT": 45.0})
+        
+        assert triggered == []
+        assert long.current_price == pytest.approx(110.0)
+        assert long.unrealized_pnl == pytest.approx(10.0)
+        assert long.unrealized_pnl_percentage == pytest.approx(10.0)
+        assert short.current_price == pytest.approx(45.0)
+        assert short.unrealized_pnl == pytest.approx(10.0)
+        assert short.unrealized_pnl_percentage == pytest.approx(10.0)
+        assert set(portfolio._pending_prices) == {long.id, short.id}
+        
+        # Unchanged prices queue nothing new
+        await portfolio._flush_prices()
+        portfolio._apply_prices({"BTC/USDT": 110.0, "ETH/USDT": 45.0})
+        assert portfolio._pending_prices == {}
+
+
+async def test_apply_prices_zero_and_missing():
+    """Test a zero price zeroes P&L and a None price leaves the position alone"""
+    async with in_memory_db() as session_factory, session_factory() as db:
+        portfolio = PortfolioManager(db)
+        await portfolio.initialize(10000.0)
+        long, short = await open_positions(portfolio)
+        
+        triggered = portfolio._apply_prices({"BTC/USDT": 0.0, "ETH/USDT": None})
+        
+        assert triggered == []
+        assert long.current_price == 0.0
+        assert long.unrealized_pnl == 0.0
+        assert long.unrealized_pnl_percentage == 0.0
+        assert short.current_price == pytest.approx(50.0)
+        assert set(portfolio._pending_prices) == {long.id}
+
+
+async def test_apply_prices_trips_exactly_at_levels():
+    """Test stop loss and take profit trip when the price equals the level"""
+    async with in_memory_db() as session_factory, session_factory() as db:
+        portfolio = PortfolioManager(db)
+        await portfolio.initialize(10000.0)
+        long, short = await open_positions(portfolio)
+        
+        triggered = portfolio._apply_prices({"BTC/USDT": 90.0, "ETH/USDT": 55.0})
+        assert triggered == [(long, "stop_loss"), (short, "stop_loss")]
+        assert [p.should_close() for p in (long, short)] == [(True, "stop_loss")] * 2
+        
+        triggered = portfolio._apply_prices({"BTC/USDT": 130.0, "ETH/USDT": 40.0})
+        assert triggered == [(long, "take_profit"), (short, "take_profit")]
+        
+        # Just inside the levels nothing trips
+        assert portfolio._apply_prices({"BTC/USDT": 90.01, "ETH/USDT": 54.99}) == []
+        
+        await portfolio._flush_prices()
+        await db.commit()
+        stored = await read_position(session_factory, short.id)
+        assert stored.current_price == pytest.approx(54.99)
+        assert stored.unrealized_pnl == pytest.approx(short.unrealized_pnl)
+
+
+async def test_update_position_prices_skips_unchanged_prices(monkeypatch):
+    """Test repeating the last prices issues no UPDATE and no commit"""
+    async with in_memory_db() as session_factory, session_factory() as db:
+        portfolio = PortfolioManager(db)
+        await portfolio.initialize(10000.0)
+        await portfolio.open_position("binance", "BTC/USDT", "long", 1.0, 100.0, "test")
+        await portfolio.update_position_prices({"BTC/USDT": 110.0})
+        
+        calls = []
+        
+        async def execute(*args, **kwargs):
+            calls.append("execute")
+        
+        async def commit():
+            calls.append("commit")
+        
+        monkeypatch.setattr(db, "execute", execute)
+        monkeypatch.setattr(db, "commit", commit)
+        
+        await portfolio.update_position_prices({"BTC/USDT": 110.0, "ETH/USDT": 50.0})
+        assert calls == []
+        
+        await portfolio.update_position_prices({"BTC/USDT": 111.0})
+        assert calls == ["execute", "commit"]
@@ -0,0 +1,43 @@
+"""
+Tests for the trading bot orchestrator
+"""
+from types import SimpleNamespace
+
+import app.core.error_recovery as error_recovery
+from app.core.event_bus import EventType
+from app.core.trading_bot import TradingBot
+
+
+class RecordingEventBus:
+    """Collects emitted events instead of delivering them"""
+    
+    def __init__(self):
+        self.events = []
+    
+    async def emit(self, event_type, data, source=""):
+        self.events.append((event_type, data))
+
+
+async def test_single_failing_strategy_pauses_bot(monkeypatch):
+    """Test one strategy failing every tick still pauses the bot"""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(
+        error_recovery, "time",
+        SimpleNamespace(monotonic=lambda: clock.now, time=error_recovery.time.time)
+    )
+    bot = TradingBot()
+    bot.event_bus = RecordingEventBus()
+    strategy = SimpleNamespace(symbol="BTC/USDT")
+    
+    # One attempt per tick; the first ticks are too few attempts to judge
+    for _ in range(bot.error_rate_min_attempts - 1):
+        await bot._run_one("failing", strategy, RuntimeError("fetch failed"), None, None)
+        clock.now += bot.update_interval
+    assert not bot.is_paused
+    
+    await bot._run_one("failing", strategy, RuntimeError("fetch failed"), None, None)
+    
+    assert bot.is_paused
+    [(event_type, data)] = bot.event_bus.events
+    assert event_type == EventType.STRATEGY_ERROR
+    assert data["error_rate"] == 1.0